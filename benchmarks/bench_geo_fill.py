@@ -0,0 +1,68 @@
+"""Benchmark the coordinate imputation: per-group lambdas vs hierarchical_fill.
+
+The cleaned-but-not-geo-filled NOAA frame is tiled up to ``--rows`` rows.
+Every tile gets its own copy of the Location Names, so the number of groups
+grows with the data the way it does for runup and synthetic catalogs.
+
+    python -m benchmarks.bench_geo_fill --rows 30000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tsunami_study.impute import hierarchical_fill
+from tsunami_study.pipeline import RAW_DATA, cast, drop, filter_validity, impute, load
+
+
+def lambda_fill(df):
+    """The original geo-fill from Tsunami Study (Python).py."""
+    df = df.copy()
+    df['Latitude'] = df.groupby('Location Name')['Latitude'].transform(lambda x: x.fillna(x.mean()))
+    df['Longitude'] = df.groupby('Location Name')['Longitude'].transform(lambda x: x.fillna(x.mean()))
+    df['Latitude'] = df.groupby('Country')['Latitude'].transform(lambda x: x.fillna(x.mean()))
+    df['Longitude'] = df.groupby('Country')['Longitude'].transform(lambda x: x.fillna(x.mean()))
+    df['Latitude'] = df['Latitude'].fillna(df['Latitude'].median())
+    df['Longitude'] = df['Longitude'].fillna(df['Longitude'].median())
+    return df
+
+
+def scaled_frame(base, rows):
+    reps = -(-rows // len(base))
+    df = pd.concat([base] * reps, ignore_index=True).iloc[:rows]
+    tile = (np.arange(len(df)) // len(base)).astype(str)
+    df['Location Name'] = df['Location Name'].astype(str) + '#' + tile
+    return df
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1721, 30000, 300000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    base = impute(filter_validity(cast(drop(load(RAW_DATA)))))
+    print(f"{'rows':>10} {'groups':>8} {'lambda s':>10} {'vector s':>10} {'speedup':>8}")
+    for rows in args.rows:
+        df = scaled_frame(base, rows)
+        legacy_time, legacy = best_of(lambda_fill, df, args.repeat)
+        vector_time, (vector, _) = best_of(hierarchical_fill, df, args.repeat)
+        cols = ['Latitude', 'Longitude']
+        np.testing.assert_allclose(vector[cols].to_numpy(), legacy[cols].to_numpy(), rtol=1e-12)
+        print(f"{rows:>10} {df['Location Name'].nunique():>8} {legacy_time:>10.4f} "
+              f"{vector_time:>10.4f} {legacy_time / vector_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
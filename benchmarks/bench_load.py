@@ -0,0 +1,65 @@
+"""Benchmark the raw TSV load: inferred 51-column read vs the declared schema.
+
+The NOAA file is scaled up to ``--rows`` rows by repeating its data lines.
+Each variant runs in a fresh process, which reports the load time and how
+far the load raised the peak RSS above the process baseline.
+
+    python -m benchmarks.bench_load --rows 100000 1000000
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from tsunami_study.pipeline import RAW_DATA, cast, drop, load
+
+
+def scaled_tsv(path, rows):
+    with open(RAW_DATA) as fh:
+        header, *lines = fh.read().splitlines()
+    lines = [line for line in lines if line.strip()]
+    with open(path, 'w') as out:
+        out.write(header + '\n')
+        for start in range(0, rows, len(lines)):
+            out.write('\n'.join(lines[:rows - start]) + '\n')
+    return path
+
+
+def run_variant(args):
+    path, narrow, engine = args
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    df = cast(drop(load(path, narrow=narrow, engine=engine)))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, (peak - before) / 1024, df.memory_usage(deep=True).sum() / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    args = parser.parse_args()
+
+    variants = [('inferred (current)', False, 'c'), ('schema, c', True, 'c')]
+    try:
+        import pyarrow  # noqa: F401
+        variants.append(('schema, pyarrow', True, 'pyarrow'))
+    except ImportError:
+        pass
+
+    ctx = multiprocessing.get_context('spawn')
+    print(f"{'rows':>10} {'variant':<20} {'load s':>8} {'peak RSS +MiB':>14} {'frame MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = scaled_tsv(os.path.join(tmp, f"tsunami-{rows}.tsv"), rows)
+            for name, narrow, engine in variants:
+                with ctx.Pool(1) as pool:
+                    elapsed, rss, frame = pool.apply(run_variant, ((path, narrow, engine),))
+                print(f'{rows:>10} {name:<20} {elapsed:>8.3f} {rss:>14.1f} {frame:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Time and memory-profile every cleaning stage and plotting step on synthetic catalogs.
+
+For every ``--rows`` a synthetic NOAA-schema catalog is generated once into
+``--data-dir`` and run through load, each of ``default_stages()``,
+``describe(include='all')`` and the univariate and top-category figures.
+Each step is timed on its own and then rerun under ``tracemalloc`` for its
+peak allocation. Results are appended to ``--results`` (JSON lines, one per
+step) and compared with the previous run of the same size; slowdowns above
+``--threshold`` are flagged.
+
+    python -m benchmarks.bench_pipeline --rows 10000 1000000
+    python -m benchmarks.bench_pipeline --rows 50000000 --skip-plots --no-memory
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from matplotlib.figure import Figure
+
+from tsunami_study.pipeline import default_stages, load
+from tsunami_study.report import draw_top_categories, draw_univariate, figure_kinds
+from tsunami_study.synthetic import generate_catalog
+
+RESULTS = os.path.join('benchmarks', 'results.jsonl')
+DATA_DIR = os.path.join('.tsunami_cache', 'synthetic')
+
+
+def describe(df):
+    df.describe(include='all')
+    return df
+
+
+def plot_univariate(df):
+    for kind, col in figure_kinds(df):
+        if kind == 'univariate':
+            fig = Figure(figsize=(15, 4))
+            draw_univariate(fig, df[col])
+            fig.savefig(io.BytesIO(), format='png')
+    return df
+
+
+def plot_top_categories(df):
+    for kind, col in figure_kinds(df):
+        if kind == 'top_categories':
+            fig = Figure(figsize=(8, 6))
+            draw_top_categories(fig.subplots(), df[col])
+            fig.savefig(io.BytesIO(), format='png')
+    return df
+
+
+def measure(func, df, params, memory):
+    """Run ``func(df, **params)``, returning ``(result, seconds, peak MiB or None)``."""
+    start = time.perf_counter()
+    result = func(df, **params)
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func(df, **params)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def steps(path, out_dir, plots):
+    """Yield ``(name, func, params)`` in pipeline order; ``func`` takes the previous result."""
+    yield 'load', lambda _: load(path), {}
+    for stage in default_stages(export_paths=[os.path.join(out_dir, 'cleaned.csv')],
+                                columnar=os.path.join(out_dir, 'cleaned')):
+        yield stage.name, stage.func, stage.params
+    yield 'describe', describe, {}
+    if plots:
+        yield 'plot_univariate', plot_univariate, {}
+        yield 'plot_top_categories', plot_top_categories, {}
+
+
+def previous_run(results_path, rows):
+    """Return ``{step: seconds}`` of the latest recorded run with ``rows`` rows."""
+    if not os.path.exists(results_path):
+        return {}
+    runs = {}
+    with open(results_path) as fh:
+        for line in fh:
+            record = json.loads(line)
+            if record['rows'] == rows:
+                runs.setdefault(record['run'], {})[record['step']] = record['seconds']
+    return runs[max(runs)] if runs else {}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--results', default=RESULTS)
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown to flag')
+    parser.add_argument('--no-memory', dest='memory', action='store_false')
+    parser.add_argument('--skip-plots', dest='plots', action='store_false')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    run = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    commit = git_commit()
+    slower = 0
+    for rows in args.rows:
+        path = os.path.join(args.data_dir, f'catalog-{rows}-{args.seed}.tsv')
+        if not os.path.exists(path):
+            generate_catalog(path, rows, seed=args.seed)
+        before = previous_run(args.results, rows)
+        print(f'\n{rows} rows ({path})')
+        print(f"{'step':<20} {'rows out':>10} {'seconds':>9} {'peak MiB':>9} {'previous':>9} {'change':>8}")
+        records = []
+        with tempfile.TemporaryDirectory() as out_dir:
+            df = None
+            for name, func, params in steps(path, out_dir, args.plots):
+                df, seconds, peak = measure(func, df, params, args.memory)
+                change = seconds / before[name] - 1 if name in before else None
+                flag = ' !' if change is not None and change > args.threshold else ''
+                slower += bool(flag)
+                print(f"{name:<20} {len(df):>10} {seconds:>9.3f} {'-' if peak is None else f'{peak:.1f}':>9} "
+                      f"{'-' if change is None else f'{before[name]:.3f}':>9} "
+                      f"{'' if change is None else f'{change:+.0%}':>8}{flag}")
+                records.append({'run': run, 'commit': commit, 'rows': rows, 'seed': args.seed, 'step': name,
+                                'rows_out': len(df), 'seconds': seconds, 'peak_mib': peak})
+        os.makedirs(os.path.dirname(args.results) or '.', exist_ok=True)
+        with open(args.results, 'a') as fh:
+            fh.writelines(json.dumps(record) + '\n' for record in records)
+    if slower:
+        print(f'\n{slower} step(s) slower than the previous run by more than {args.threshold:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark radius and k-nearest queries: full haversine scan vs SpatialIndex.
+
+The geo-filled NOAA events are tiled up to ``--rows`` points, every tile
+jittered by up to a degree, and queried from ``--queries`` random coastal
+points (event locations, shifted by up to two degrees). The batch columns
+time one ``within_batch``/``nearest_batch`` call over all queries, per query.
+
+    python -m benchmarks.bench_spatial --rows 1721 100000 1000000 --km 300 --k 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from tsunami_study.pipeline import RAW_DATA, cast, drop, filter_validity, geo_fill, impute, load
+from tsunami_study.spatial import SpatialIndex, haversine
+
+
+def scaled_points(lat, lon, rows, rng):
+    reps = -(-rows // len(lat))
+    # The first tile keeps the real coordinates.
+    jitter = np.arange(rows) >= len(lat)
+    lat = np.tile(lat, reps)[:rows]
+    lon = np.tile(lon, reps)[:rows]
+    lat = np.clip(lat + jitter * rng.uniform(-1, 1, rows), -90, 90)
+    lon = (lon + jitter * rng.uniform(-1, 1, rows) + 180) % 360 - 180
+    return lat, lon
+
+
+def scan_within(lat, lon, qlat, qlon, km):
+    distances = haversine(qlat, qlon, lat, lon)
+    inside = np.flatnonzero(distances <= km)
+    return inside[np.argsort(distances[inside], kind='stable')]
+
+
+def scan_nearest(lat, lon, qlat, qlon, k):
+    distances = haversine(qlat, qlon, lat, lon)
+    return np.sort(distances)[:k]
+
+
+def per_query(func, queries):
+    start = time.perf_counter()
+    results = [func(qlat, qlon) for qlat, qlon in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1721, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--km', type=float, default=300.0)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--cell-deg', type=float, default=1.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = geo_fill(impute(filter_validity(cast(drop(load(RAW_DATA))))))
+    print(f"{'rows':>10} {'build ms':>9} {'scan r us':>10} {'index r us':>11} "
+          f"{'scan k us':>10} {'index k us':>11} {'batch r us':>11} {'batch k us':>11} {'hits':>7}")
+    for rows in args.rows:
+        lat, lon = scaled_points(base['Latitude'].to_numpy(), base['Longitude'].to_numpy(), rows, rng)
+        pick = rng.integers(0, len(base), args.queries)
+        qlats = np.clip(base['Latitude'].to_numpy()[pick] + rng.uniform(-2, 2, args.queries), -90, 90)
+        qlons = base['Longitude'].to_numpy()[pick] + rng.uniform(-2, 2, args.queries)
+        queries = list(zip(qlats, qlons))
+
+        start = time.perf_counter()
+        index = SpatialIndex(lat, lon, args.cell_deg)
+        build = time.perf_counter() - start
+
+        scan_r, expected = per_query(lambda a, b: scan_within(lat, lon, a, b, args.km), queries)
+        index_r, found = per_query(lambda a, b: index.within(a, b, args.km)[1], queries)
+        for want, got in zip(expected, found):
+            assert np.array_equal(np.sort(want), np.sort(got))
+        scan_k, expected = per_query(lambda a, b: scan_nearest(lat, lon, a, b, args.k), queries)
+        index_k, found = per_query(lambda a, b: index.nearest(a, b, args.k)[0], queries)
+        np.testing.assert_allclose(np.array(found), np.array(expected), rtol=1e-12)
+
+        batch_r, (within,) = per_query(lambda a, b: index.within_batch(a, b, args.km), [(qlats, qlons)])
+        batch_k, ((nearest, _),) = per_query(lambda a, b: index.nearest_batch(a, b, args.k), [(qlats, qlons)])
+        batch_r, batch_k = batch_r / len(queries), batch_k / len(queries)
+        for (qlat, qlon), (_, positions) in zip(queries, within):
+            assert np.array_equal(positions, index.within(qlat, qlon, args.km)[1])
+        np.testing.assert_array_equal(nearest, np.array(found))
+
+        hits = np.mean([len(positions) for _, positions in within])
+        print(f'{rows:>10} {build * 1e3:>9.1f} {scan_r * 1e6:>10.1f} {index_r * 1e6:>11.1f} '
+              f'{scan_k * 1e6:>10.1f} {index_k * 1e6:>11.1f} {batch_r * 1e6:>11.1f} {batch_k * 1e6:>11.1f} '
+              f'{hits:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
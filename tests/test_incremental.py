@@ -0,0 +1,90 @@
+"""Regression checks for the append path of :func:`tsunami_study.ingest`."""
+
+from pathlib import Path
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from tsunami_study import FLOAT_TO_INT, AggregateCube, clean_pipeline, ingest
+
+RAW_DATA = Path(__file__).resolve().parent.parent / 'Tsunami(1750-present).tsv'
+
+
+def _assert_cleaned(got, expected):
+    assert (got.dtypes[FLOAT_TO_INT] == expected.dtypes[FLOAT_TO_INT]).all()
+    assert_frame_equal(got.reset_index(drop=True), expected.reset_index(drop=True),
+                       check_dtype=False, check_categorical=False)
+
+
+def test_append_matches_full_clean(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lines = RAW_DATA.read_bytes().splitlines(keepends=True)
+    feed = tmp_path / 'feed.tsv'
+    feed.write_bytes(b''.join(lines[:1800]))
+    first = ingest(str(feed), 'state.pkl', export_paths=['inc.csv'], reimpute_tolerance=0)
+
+    # The feed only grows at the end; the second ingest parses the tail alone.
+    feed.write_bytes(b''.join(lines))
+    appended = ingest(str(feed), 'state.pkl', export_paths=['inc.csv'], reimpute_tolerance=0)
+    expected = clean_pipeline(str(feed), export_paths=[], use_cache=False)
+
+    assert len(first) < len(appended)
+    _assert_cleaned(appended, expected)
+
+
+# How the feed is cut while the next line is being written.
+CUTS = {
+    'mid_line': lambda line: line[:line.index(b'"\t') + 2],
+    'mid_quote': lambda line: line[:line.index(b'"') + 4],
+    'newline_missing': lambda line: b'',
+}
+
+
+@pytest.mark.parametrize('cut', CUTS)
+def test_partial_last_line_waits_for_the_rest(tmp_path, monkeypatch, cut):
+    monkeypatch.chdir(tmp_path)
+    lines = RAW_DATA.read_bytes().splitlines(keepends=True)
+    settled = tmp_path / 'settled.tsv'
+    settled.write_bytes(b''.join(lines[:1800]))
+    feed = tmp_path / 'feed.tsv'
+    head = b''.join(lines[:1800])
+    if cut == 'newline_missing':
+        # A complete last line is ingested; the newline arrives with the next event.
+        head = head.rstrip(b'\n')
+    feed.write_bytes(head + CUTS[cut](lines[1800]))
+
+    partial = ingest(str(feed), 'state.pkl', export_paths=['inc.csv'], reimpute_tolerance=0)
+    _assert_cleaned(partial, clean_pipeline(str(settled), export_paths=[], use_cache=False))
+
+    feed.write_bytes(b''.join(lines))
+    appended = ingest(str(feed), 'state.pkl', export_paths=['inc.csv'], reimpute_tolerance=0)
+    _assert_cleaned(appended, clean_pipeline(str(feed), export_paths=[], use_cache=False))
+
+
+def test_first_ingest_rewrites_existing_exports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    clean_pipeline(str(RAW_DATA), export_paths=['out.csv'], columnar=None, use_cache=False)
+    cleaned = ingest(str(RAW_DATA), 'state.pkl', export_paths=['out.csv'], columnar=None)
+
+    with open('out.csv') as fh:
+        assert sum(1 for _ in fh) == len(cleaned) + 1
+
+
+def test_cube_is_rebuilt_unless_written_by_the_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lines = RAW_DATA.read_bytes().splitlines(keepends=True)
+    feed = tmp_path / 'feed.tsv'
+
+    def events(rows):
+        feed.write_bytes(b''.join(lines[:rows]))
+        cleaned = ingest(str(feed), 'state.pkl', export_paths=['out.csv'], columnar='cleaned')
+        return AggregateCube.load('cleaned.cube.pkl').query()['events'].sum(), len(cleaned)
+
+    first, second = events(1800), events(2000)
+    assert first[0] == first[1] and second[0] == second[1]
+
+    # A full clean in between replaces the cube with one that already holds the next rows.
+    feed.write_bytes(b''.join(lines))
+    clean_pipeline(str(feed), export_paths=[], columnar='cleaned', use_cache=False)
+    cube, rows = events(len(lines))
+    assert cube == rows
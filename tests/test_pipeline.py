@@ -0,0 +1,53 @@
+"""Checks that the stage cache reruns exactly the stages whose inputs or code changed."""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from tsunami_study import clean_pipeline
+
+ROOT = Path(__file__).resolve().parent.parent
+RAW_DATA = ROOT / 'Tsunami(1750-present).tsv'
+
+# Runs the pipeline on a copy of the package and prints the stages it recomputed.
+SCRIPT = f'''
+import logging, sys
+logging.basicConfig(level=logging.INFO, stream=sys.stdout, format='%(message)s')
+from tsunami_study import clean_pipeline
+clean_pipeline({str(RAW_DATA)!r}, export_paths=['out.csv'], columnar=None)
+'''
+
+
+def _computed(cwd):
+    out = subprocess.run([sys.executable, '-c', SCRIPT], cwd=cwd, capture_output=True, text=True, check=True).stdout
+    return [line.split()[1].rstrip(':') for line in out.splitlines() if line.endswith('rows)') and 'computed' in line]
+
+
+def _edit(path):
+    with open(path, 'a') as fh:
+        fh.write('\n# edited\n')
+
+
+def test_code_edits_rerun_only_dependent_stages(tmp_path):
+    shutil.copytree(ROOT / 'tsunami_study', tmp_path / 'tsunami_study', ignore=shutil.ignore_patterns('__pycache__'))
+    assert _computed(tmp_path)[0] == 'load'
+
+    _edit(tmp_path / 'tsunami_study' / 'report.py')
+    assert _computed(tmp_path) == []
+
+    _edit(tmp_path / 'tsunami_study' / 'impute.py')
+    assert _computed(tmp_path) == ['geo_fill', 'export']
+
+    _edit(tmp_path / 'tsunami_study' / 'pipeline.py')
+    assert _computed(tmp_path)[0] == 'load'
+
+
+def test_rewritten_outputs_rerun_export(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cleaned = clean_pipeline(str(RAW_DATA), export_paths=['out.csv'], columnar=None)
+    # Same size, different file: only the modification time tells.
+    Path('out.csv').write_bytes(Path('out.csv').read_bytes().replace(b',', b';'))
+
+    assert clean_pipeline(str(RAW_DATA), export_paths=['out.csv'], columnar=None).equals(cleaned)
+    assert Path('out.csv').read_text().count(';') == 0
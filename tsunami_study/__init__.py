@@ -0,0 +1,27 @@
+"""Cleaning and analysis toolkit for the NOAA tsunami event catalog."""
+
+from .pipeline import (
+    COL_DROP,
+    EXPORT_PATHS,
+    FLOAT_TO_CATEGORY,
+    FLOAT_TO_INT,
+    KEEP_VALIDITY,
+    RAW_DATA,
+    REPLACE_WITH_MEDIAN,
+    Stage,
+    clean_pipeline,
+    default_stages,
+    fill_defaults,
+    fill_medians,
+    run_stages,
+)
+from .cube import AggregateCube
+from .impute import hierarchical_fill
+from .incremental import IncrementalState, ingest
+from .instrument import Instrument
+from .severity import TopK, severity_score, top_k
+from .sketch import QuantileSketch
+from .spatial import SpatialIndex, haversine
+from .storage import load_cleaned, load_numeric, write_columnar
+from .streaming import StreamSummary, stream_clean
+from .synthetic import generate_catalog
@@ -0,0 +1,107 @@
+"""Running aggregates behind the median and coordinate imputation.
+
+:class:`RunningAggregates` holds everything the impute and geo_fill stages
+need to know about the rows seen so far, in memory bounded by the number of
+distinct values and groups rather than by the number of rows:
+
+* a :class:`~tsunami_study.sketch.QuantileSketch` per imputed column,
+* Latitude/Longitude sums and counts per Location Name and per Country,
+* missing-coordinate counts per (Location Name, Country) pair, needed to
+  replay the Location Name fills into the Country means the way geo_fill does.
+
+Rows can be observed in any number of batches and retracted again, which is
+what the incremental and streaming modes build on.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .impute import COORDINATES, GEO_LEVELS
+from .pipeline import REPLACE_WITH_MEDIAN
+from .sketch import QuantileSketch
+
+IMPUTED_COLUMNS = REPLACE_WITH_MEDIAN + COORDINATES
+
+
+class RunningAggregates:
+    """Mergeable medians and group means of the observed (non-imputed) values."""
+
+    def __init__(self, max_bins=2048):
+        self.sketches = {col: QuantileSketch(max_bins) for col in IMPUTED_COLUMNS}
+        self.sums = {level: pd.DataFrame(columns=COORDINATES, dtype=float) for level in GEO_LEVELS}
+        self.counts = {level: pd.DataFrame(columns=COORDINATES, dtype=float) for level in GEO_LEVELS}
+        self.missing = pd.DataFrame(
+            columns=COORDINATES, dtype=float, index=pd.MultiIndex.from_tuples([], names=GEO_LEVELS))
+
+    def observe(self, df, sign=1):
+        """Add (``sign=1``) or retract (``sign=-1``) the non-null values of ``df``."""
+        for col in IMPUTED_COLUMNS:
+            if sign > 0:
+                self.sketches[col].update(df[col])
+            else:
+                self.sketches[col].remove(df[col])
+        keys = {level: _plain(df[level]) for level in GEO_LEVELS}
+        for level in GEO_LEVELS:
+            grouped = df[COORDINATES].groupby(keys[level])
+            self.sums[level] = self.sums[level].add(sign * grouped.sum(), fill_value=0)
+            self.counts[level] = self.counts[level].add(sign * grouped.count(), fill_value=0)
+        missing = df[COORDINATES].isna().groupby([keys[level] for level in GEO_LEVELS], dropna=False).sum()
+        self.missing = self.missing.add(sign * missing, fill_value=0)
+        return self
+
+    def median_fills(self):
+        """Return the current median of every column in ``REPLACE_WITH_MEDIAN``."""
+        return pd.Series({col: self.sketches[col].median() for col in REPLACE_WITH_MEDIAN})
+
+    def coordinate_table(self):
+        """Return ``(location_means, country_means, medians)`` for :meth:`coordinate_fills`."""
+        # Same order as geo_fill: Location Name means, then Country means over the
+        # observed and Location-filled coordinates, then the median of all of those.
+        missing = self.missing
+        location = _means(self.sums['Location Name'], self.counts['Location Name'])
+        pair_loc = _pair_means(missing, 'Location Name', location)
+        by_loc = missing.where(pair_loc.notna(), 0)
+        country_sums = self.sums['Country'].add((by_loc * pair_loc.fillna(0)).groupby(level='Country').sum(), fill_value=0)
+        country_counts = self.counts['Country'].add(by_loc.groupby(level='Country').sum(), fill_value=0)
+        country = _means(country_sums, country_counts)
+        pair_country = _pair_means(missing, 'Country', country)
+        by_country = (missing - by_loc).where(pair_country.notna(), 0)
+        medians = {}
+        for col in COORDINATES:
+            sketch = QuantileSketch(self.sketches[col].max_bins).merge(self.sketches[col])
+            sketch.update(pair_loc[col], by_loc[col])
+            sketch.update(pair_country[col], by_country[col])
+            medians[col] = sketch.median()
+        return location, country, medians
+
+    def coordinate_fills(self, df, table=None):
+        """Return the Latitude/Longitude geo_fill would give each row of ``df``.
+
+        Pass a precomputed :meth:`coordinate_table` when filling many batches
+        against the same aggregates.
+        """
+        location, country, medians = table or self.coordinate_table()
+        fills = pd.DataFrame(np.nan, index=df.index, columns=COORDINATES)
+        for col in COORDINATES:
+            fills[col] = _plain(df['Location Name']).map(location[col])
+            fills[col] = fills[col].fillna(_plain(df['Country']).map(country[col]))
+            fills[col] = fills[col].fillna(medians[col])
+        return fills
+
+
+def _plain(series):
+    # Chunks carry their own category sets; group on the labels themselves.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(object)
+    return series
+
+
+def _means(sums, counts):
+    return sums.where(counts > 0) / counts.where(counts > 0)
+
+
+def _pair_means(missing, level, means):
+    """Broadcast per-``level`` means onto the (Location Name, Country) pairs."""
+    pair = means.reindex(missing.index.get_level_values(level))
+    pair.index = missing.index
+    return pair
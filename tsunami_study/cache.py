@@ -0,0 +1,124 @@
+"""On-disk cache for pipeline stage outputs.
+
+Every stage output is stored under a key derived from the key of its input,
+the stage's parameters and the source of the modules it runs, so a rerun
+only recomputes the stages whose inputs or code actually changed.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+# Files are hashed in blocks so that large NOAA drops never sit in memory twice.
+_BLOCK_SIZE = 1 << 20
+
+
+def hash_file(path):
+    """Return the sha256 hex digest of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_params(params):
+    """Return a stable digest of a parameter mapping."""
+    encoded = json.dumps(params, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def hash_function(func):
+    """Return a digest of a function's own source (not of what it calls)."""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = f'{func.__module__}.{func.__qualname__}'
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def hash_modules(names):
+    """Return a digest of the source files of the modules ``names`` (dotted names)."""
+    digest = hashlib.sha256()
+    for name in sorted(set(names)):
+        digest.update(name.encode('utf-8'))
+        path = getattr(importlib.import_module(name), '__file__', None)
+        if path:
+            digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def stage_key(name, input_key, params, func=None, modules=()):
+    """Chain a stage's input key, parameters and code into its output key.
+
+    The code is ``func`` with its whole module, which covers the helpers and
+    constants next to it, plus ``modules``: the other modules the stage
+    calls into. Editing any other module leaves the key unchanged.
+    """
+    parts = [name, input_key, hash_params(params)]
+    if func is not None:
+        parts.append(hash_function(func))
+        modules = (func.__module__,) + tuple(modules)
+    if modules:
+        parts.append(hash_modules(modules))
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def write_pickle(path, value):
+    """Pickle ``value`` to ``path`` through a temporary file, so readers never see a partial write."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class StageCache:
+    """Pickle store for stage outputs, one file per (stage, key)."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _path(self, name, key):
+        return self.directory / f'{name}-{key[:20]}.pkl'
+
+    def __contains__(self, item):
+        name, key = item
+        return self._path(name, key).exists()
+
+    def get(self, name, key):
+        """Return the cached output for ``(name, key)`` or ``None``."""
+        path = self._path(name, key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as fh:
+                return pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A truncated entry is just a miss; the stage reruns and rewrites it.
+            return None
+
+    def put(self, name, key, value):
+        """Store ``value`` for ``(name, key)``, replacing older entries for ``name``."""
+        target = self._path(name, key)
+        write_pickle(target, value)
+        for stale in self.directory.glob(f'{name}-*.pkl'):
+            if stale != target:
+                stale.unlink(missing_ok=True)
+
+    def clear(self):
+        """Remove every cached stage output."""
+        if self.directory.exists():
+            for path in self.directory.glob('*.pkl'):
+                path.unlink(missing_ok=True)
@@ -0,0 +1,199 @@
+"""Missing-aware Pearson and Spearman correlation of the numeric columns.
+
+On the median-filled frame the fills pile up on one value per column (see
+the spikes in magnitude and intensity) and pull the coefficients around. :func:`correlation` works on the raw values from
+:func:`raw_numeric` instead and uses, for every pair of columns, only the rows
+where both are present. All pairs come out of a few masked matrix products
+rather than a loop over pairs.
+
+:func:`bootstrap` adds percentile confidence bounds, with the resamples spread
+over a process pool. Both results are cached on disk under the hash of the
+data and the parameters.
+"""
+
+import hashlib
+import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cache import StageCache, hash_function, hash_params
+from .pipeline import DEFAULT_CACHE_DIR, FLOAT_TO_CATEGORY, KEEP_VALIDITY, RAW_DATA, drop, filter_validity, load
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('pearson', 'spearman')
+
+# Resamples per task; fixed so the bounds do not depend on the pool size.
+_BOOT_BLOCK = 50
+
+# The matrix bootstrap() resamples, handed to every worker once by _init_worker.
+_values = None
+
+
+def raw_numeric(path=RAW_DATA, keep=KEEP_VALIDITY):
+    """Return the numeric columns of the kept events before any imputation."""
+    df = filter_validity(drop(load(path)), keep)
+    columns = [col for col in df.select_dtypes(include='number').columns if col not in FLOAT_TO_CATEGORY]
+    return df[columns].reset_index(drop=True)
+
+
+def correlation(df, method='pearson', min_periods=1, cache_dir=DEFAULT_CACHE_DIR):
+    """Pairwise-complete correlation matrix of the numeric columns of ``df``.
+
+    ``method`` is ``'pearson'`` or ``'spearman'``. Pairs with fewer than
+    ``min_periods`` common observations are NaN. Pearson comes out of masked
+    matrix products in one go; Spearman sorts every column once and reads
+    the ranks over each pair's common rows off those orders.
+    ``cache_dir=None`` disables the cache.
+    """
+    values, columns = _matrix(df, method)
+    params = {'method': method, 'min_periods': min_periods}
+    return _cached(f'correlation-{method}', values, columns, params, cache_dir,
+                   lambda: pd.DataFrame(_corr(values, method, min_periods), index=columns, columns=columns))
+
+
+def bootstrap(df, method='pearson', n_boot=1000, ci=0.95, min_periods=1, seed=0, processes=None,
+              cache_dir=DEFAULT_CACHE_DIR):
+    """Percentile bootstrap bounds of :func:`correlation`, returned as ``(low, high)`` frames.
+
+    Rows are resampled ``n_boot`` times; the resamples are computed in blocks
+    across a pool of ``processes`` workers (default: one per CPU), each block
+    with its own child of ``seed``, so the bounds only depend on ``seed``.
+    """
+    values, columns = _matrix(df, method)
+    params = {'method': method, 'n_boot': n_boot, 'ci': ci, 'min_periods': min_periods, 'seed': seed}
+
+    def compute():
+        sizes = [min(_BOOT_BLOCK, n_boot - start) for start in range(0, n_boot, _BOOT_BLOCK)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        # The matrix goes to each worker once, instead of pickled with every block.
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(values,)) as pool:
+            blocks = pool.map(_resample, [method] * len(sizes), [min_periods] * len(sizes), sizes, seeds)
+            samples = np.concatenate(list(blocks))
+        tail = (1 - ci) / 2 * 100
+        with warnings.catch_warnings():
+            # Pairs that never have enough common rows stay NaN.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+        return (pd.DataFrame(low, index=columns, columns=columns),
+                pd.DataFrame(high, index=columns, columns=columns))
+
+    return _cached(f'bootstrap-{method}', values, columns, params, cache_dir, compute)
+
+
+def _matrix(df, method):
+    if method not in METHODS:
+        raise ValueError(f'method must be one of {METHODS}, got {method!r}')
+    numeric = df.select_dtypes(include='number')
+    return numeric.to_numpy(dtype=np.float64), list(numeric.columns)
+
+
+def _cached(name, values, columns, params, cache_dir, compute):
+    if not cache_dir:
+        return compute()
+    cache = StageCache(cache_dir)
+    code = [hash_function(func) for func in (_corr, _spearman, _tie_bounds, _subset_ranks, _paired)]
+    data = hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest()
+    key = hash_params(dict(params, columns=columns, code=code, data=data))
+    result = cache.get(name, key)
+    if result is not None:
+        logger.info('%s: cached', name)
+        return result
+    result = compute()
+    cache.put(name, key, result)
+    return result
+
+
+def _corr(values, method, min_periods):
+    """Correlate every pair of columns of ``values`` over the rows where both are present."""
+    if method == 'spearman':
+        return _spearman(values, min_periods)
+    present = ~np.isnan(values)
+    weights = present.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Centering on the column means keeps the sums below from cancelling.
+        means = np.where(present, values, 0).sum(axis=0) / weights.sum(axis=0)
+        x = np.where(present, values - means, 0)
+        n = weights.T @ weights
+        # sums[i, j] is the sum of column i over the rows where column j is present too.
+        sums = x.T @ weights
+        squares = (x * x).T @ weights
+        cov = x.T @ x - sums * sums.T / n
+        var = squares - sums * sums / n
+        r = cov / np.sqrt(var * var.T)
+    r[n < max(min_periods, 1)] = np.nan
+    return np.clip(r, -1, 1)
+
+
+def _spearman(values, min_periods):
+    """Pearson of the ranks, each pair ranked over the rows it shares, like ``DataFrame.corr``."""
+    present = ~np.isnan(values)
+    # Every column is sorted once; the per-pair ranks are read off the sorted orders.
+    order = np.argsort(values, axis=0, kind='stable')
+    ordered = np.take_along_axis(values, order, axis=0)
+    start, end = _tie_bounds(ordered)
+    columns = values.shape[1]
+    r = np.empty((columns, columns))
+    for i in range(columns):
+        pairs = slice(i, columns)
+        # Column j of x: ranks of column i over the rows where i and j are present,
+        # column j of y: ranks of column j over those same rows.
+        keep = present[order[:, i], pairs] & ~np.isnan(ordered[:, [i]])
+        x = _subset_ranks(order[:, [i]], start[:, [i]], end[:, [i]], keep)
+        keep = present[order[:, pairs], i] & ~np.isnan(ordered[:, pairs])
+        y = _subset_ranks(order[:, pairs], start[:, pairs], end[:, pairs], keep)
+        r[i, pairs] = r[pairs, i] = _paired(x, y, min_periods)
+    return r
+
+
+def _tie_bounds(ordered):
+    """First and one-past-last sorted position of the run of equal values around each position."""
+    rows = len(ordered)
+    position = np.arange(rows, dtype=np.intp)[:, None]
+    tie = ordered[1:] == ordered[:-1]
+    start = np.where(np.vstack([np.zeros_like(tie[:1]), tie]), 0, position)
+    end = np.where(np.vstack([tie, np.zeros_like(tie[:1])]), rows, position + 1)
+    return np.maximum.accumulate(start, axis=0), np.minimum.accumulate(end[::-1], axis=0)[::-1]
+
+
+def _subset_ranks(order, start, end, keep):
+    """Average ranks among the kept values of sorted columns, scattered back to row order.
+
+    ``order`` is the argsort of one or more columns and ``start``/``end`` its
+    :func:`_tie_bounds`; ``keep`` flags, in sorted order and per output
+    column, the values to rank. Values that are not kept come out NaN.
+    """
+    counts = np.zeros((len(keep) + 1, keep.shape[1]), dtype=np.int32)
+    np.cumsum(keep, axis=0, out=counts[1:])
+    before = np.take_along_axis(counts, start, axis=0)
+    within = np.take_along_axis(counts, end, axis=0) - before
+    ranks = np.empty(keep.shape)
+    np.put_along_axis(ranks, np.broadcast_to(order, keep.shape), np.where(keep, before + (within + 1) / 2, np.nan),
+                      axis=0)
+    return ranks
+
+
+def _paired(x, y, min_periods):
+    """Pearson of column i of ``x`` with column i of ``y``, both NaN on the same rows."""
+    present = ~np.isnan(x)
+    n = present.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.where(present, x - np.nansum(x, axis=0) / n, 0)
+        y = np.where(present, y - np.nansum(y, axis=0) / n, 0)
+        r = (x * y).sum(axis=0) / np.sqrt((x * x).sum(axis=0) * (y * y).sum(axis=0))
+    r[n < max(min_periods, 1)] = np.nan
+    return np.clip(r, -1, 1)
+
+
+def _init_worker(values):
+    global _values
+    _values = values
+
+
+def _resample(method, min_periods, size, seed):
+    rng = np.random.default_rng(seed)
+    rows = len(_values)
+    return np.stack([_corr(_values[rng.integers(0, rows, rows)], method, min_periods) for _ in range(size)])
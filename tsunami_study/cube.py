@@ -0,0 +1,121 @@
+"""Materialized aggregate cube over the cleaned events.
+
+The dashboards ask the same roll-ups of the cleaned frame over and over:
+event counts, deaths, damage and maximum water height by Region, Country,
+decade, cause and validity. :class:`AggregateCube` keeps, for every distinct
+combination of :data:`DIMENSIONS`, the number of events and the sum, count,
+min and max of every measure. Those partials combine across cells, so
+:meth:`AggregateCube.query` answers any roll-up or slice (and the means)
+from the cells alone, without touching the rows.
+
+The cube is written next to the typed copies at export time and new events
+are folded into it with :meth:`AggregateCube.add`.
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .cache import write_pickle
+
+DIMENSIONS = ['Region', 'Country', 'decade', 'Tsunami Cause Code', 'Tsunami Event Validity']
+MEASURES = ['Deaths', 'Damage ($Mil)', 'Maximum Water Height (m)']
+PARTIALS = ['sum', 'count', 'min', 'max']
+STATS = ('events', 'sum', 'count', 'min', 'max', 'mean')
+
+# How each partial combines across cells.
+_COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def cube_path(base):
+    """Return the file :func:`~tsunami_study.pipeline.export` writes the cube of ``base`` to."""
+    return f'{base}.cube.pkl'
+
+
+class AggregateCube:
+    """Per-cell partials of :data:`MEASURES` over :data:`DIMENSIONS`."""
+
+    def __init__(self, cells, source=None):
+        self.cells = cells
+        # Set by ingest() to tell the cubes it can extend from ones written by others.
+        self.source = source
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the cube of a cleaned frame."""
+        return cls(_cells(df))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as fh:
+            return pickle.load(fh)
+
+    def save(self, path):
+        write_pickle(path, self)
+
+    def add(self, df):
+        """Fold the cleaned events in ``df`` into the cube."""
+        cells = pd.concat([self.cells, _cells(df)])
+        self.cells = _rollup(cells, DIMENSIONS)
+        return self
+
+    def query(self, by=(), where=None, measures=MEASURES, stats=STATS):
+        """Roll the cube up to the dimensions in ``by``.
+
+        ``where`` maps dimensions to a value or a list of values to keep
+        before rolling up. Returns one row per group, with ``events`` and a
+        ``'<measure> <stat>'`` column for every measure and statistic in
+        ``stats``; an empty ``by`` gives a single ``'all'`` row.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = set(by).union(where or {}).difference(DIMENSIONS)
+        if unknown:
+            raise KeyError(f'not a cube dimension: {sorted(unknown)}')
+        cells = self.cells
+        for dim, values in (where or {}).items():
+            values = [values] if np.ndim(values) == 0 else list(values)
+            cells = cells[cells.index.get_level_values(dim).isin(values)]
+
+        if by:
+            rolled = _rollup(cells, by)
+        else:
+            rolled = cells.agg(_aggregations(cells)).to_frame('all').T
+            rolled['events'] = rolled['events'].fillna(0)
+
+        out = pd.DataFrame(index=rolled.index)
+        if 'events' in stats:
+            out['events'] = rolled['events'].astype('int64')
+        for measure in measures:
+            for stat in stats:
+                if stat == 'mean':
+                    count = rolled[f'{measure} count']
+                    out[f'{measure} mean'] = rolled[f'{measure} sum'] / count.where(count > 0)
+                elif stat != 'events':
+                    out[f'{measure} {stat}'] = rolled[f'{measure} {stat}']
+        return out
+
+
+def _cells(df):
+    keys = [_plain(df[dim]) if dim != 'decade' else (df['Year'] // 10 * 10).astype('int64').rename('decade')
+            for dim in DIMENSIONS]
+    grouped = df[MEASURES].astype(float).groupby(keys, dropna=False, observed=True)
+    cells = grouped.agg(PARTIALS)
+    cells.columns = [f'{measure} {partial}' for measure, partial in cells.columns]
+    cells.insert(0, 'events', grouped.size())
+    return cells
+
+
+def _rollup(cells, by):
+    return cells.groupby(level=by, dropna=False).agg(_aggregations(cells))
+
+
+def _aggregations(cells):
+    return {col: 'sum' if col == 'events' else _COMBINE[col.rsplit(' ', 1)[1]] for col in cells.columns}
+
+
+def _plain(series):
+    # Cells are keyed by the values, not the categories of one particular frame.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(series.cat.categories.dtype if not series.isna().any() else object)
+    return series
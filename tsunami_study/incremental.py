@@ -0,0 +1,302 @@
+"""Incremental ingestion of the NOAA tsunami TSV.
+
+The NOAA feed only gains rows at the end, so instead of re-cleaning the whole
+file every time, :func:`ingest` keeps a persisted :class:`IncrementalState`
+with running aggregates and only cleans the rows that are new or changed:
+
+* medians of the measurement columns are kept in mergeable
+  :class:`~tsunami_study.sketch.QuantileSketch` objects,
+* the Latitude/Longitude means per Location Name and Country are kept as
+  group sums and counts,
+
+both in a :class:`~tsunami_study.aggregates.RunningAggregates`.
+
+Only complete lines are ingested; a line still being written is left for the
+next call. When the bytes already ingested are unchanged only the tail of
+the file is parsed. Otherwise the whole file is read and rows are diffed by ``Id`` and
+row hash, so edited or removed events are retracted from the aggregates.
+
+Rows imputed earlier keep the fill values they got at the time. Passing
+``reimpute_tolerance`` refills every previously imputed cell whose current
+median or group mean moved by more than that amount (in the column's own
+units). A fresh ingest reproduces :func:`clean_pipeline` as long as the
+sketches stay exact.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import pickle
+import re
+
+import pandas as pd
+
+from .aggregates import IMPUTED_COLUMNS, RunningAggregates
+from .cache import write_pickle
+from .cube import AggregateCube, cube_path
+from .impute import COORDINATES, GEO_LEVELS
+from .pipeline import (
+    COL_DROP,
+    EXPORT_PATHS,
+    FLOAT_TO_CATEGORY,
+    FLOAT_TO_INT,
+    KEEP_VALIDITY,
+    RAW_DATA,
+    REPLACE_WITH_MEDIAN,
+    export,
+    fill_defaults,
+)
+from .schema import INT_DTYPES, TSV_SCHEMA
+from .storage import CLEANED_BASE, write_columnar
+
+logger = logging.getLogger(__name__)
+
+# Not under DEFAULT_CACHE_DIR: StageCache.clear() empties that, and the state is not disposable.
+DEFAULT_STATE_PATH = os.path.join('.tsunami_state', 'incremental.pkl')
+
+# Row keys are Id * _OCCURRENCES + occurrence, since the feed repeats a few Ids.
+_OCCURRENCES = 1024
+_BLOCK_SIZE = 1 << 20
+_FLOAT32 = {col: dtype for col, dtype in TSV_SCHEMA.items() if dtype == 'float32'}
+_CATEGORIES = FLOAT_TO_CATEGORY + [col for col, dtype in TSV_SCHEMA.items() if dtype == 'category']
+
+
+class IncrementalState:
+    """Running aggregates and cleaned rows of everything ingested so far."""
+
+    def __init__(self):
+        self.token = os.urandom(8).hex()
+        self.columns = None
+        self.text_columns = []
+        self.offset = None
+        self.prefix_hash = None
+        self.row_hashes = pd.Series(dtype='uint64')
+        self.frame = None
+        self.imputed = None
+        self.aggregates = RunningAggregates()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as fh:
+            return pickle.load(fh)
+
+    def save(self, path):
+        write_pickle(path, self)
+
+    def cleaned(self):
+        """Return the cleaned frame in the same layout as :func:`clean_pipeline`."""
+        df = self.frame.reset_index(drop=True)
+        df[_CATEGORIES] = df[_CATEGORIES].astype('category')
+        return df
+
+    def update(self, path, reimpute_tolerance=None):
+        """Ingest the new or changed rows of ``path`` and return a summary dict."""
+        raw, tail_only = self._read(path)
+        hashes = pd.util.hash_pandas_object(raw, index=False)
+        if tail_only:
+            known = hashes.index.isin(self.row_hashes.index)
+            changed = hashes.index[known][hashes[known].values != self.row_hashes[hashes.index[known]].values]
+            added = hashes.index[~known]
+            removed = pd.Index([], dtype='int64')
+        else:
+            known = hashes.index.intersection(self.row_hashes.index)
+            changed = known[hashes[known].values != self.row_hashes[known].values]
+            added = hashes.index.difference(self.row_hashes.index, sort=False)
+            removed = self.row_hashes.index.difference(hashes.index)
+
+        stale = changed.append(removed)
+        if self.frame is not None:
+            self._retract(stale.intersection(self.frame.index))
+        batch = self._clean(raw.loc[changed.append(added)])
+        self.aggregates.observe(batch)
+        batch, flags = self._impute(batch)
+
+        if self.frame is None:
+            self.frame, self.imputed = batch, flags
+        else:
+            keep = self.frame.index.difference(stale, sort=False)
+            self.frame = pd.concat([self.frame.loc[keep], batch])
+            self.imputed = pd.concat([self.imputed.loc[keep], flags])
+        self.row_hashes = pd.concat([self.row_hashes.drop(stale), hashes.loc[changed.append(added)]])
+        in_place = stale.empty
+        if not tail_only and not in_place:
+            order = hashes.index[hashes.index.isin(self.frame.index)]
+            self.frame, self.imputed = self.frame.loc[order], self.imputed.loc[order]
+
+        reimputed = self._reimpute(reimpute_tolerance) if reimpute_tolerance is not None else 0
+        summary = {
+            'added': len(added),
+            'changed': len(changed),
+            'removed': len(removed),
+            'appended': len(batch) if in_place else 0,
+            'reimputed': reimputed,
+            'rewrite': not in_place or reimputed > 0,
+        }
+        logger.info('ingested %s', summary)
+        return summary
+
+    def _read(self, path):
+        # Bytes past the last complete line are not parsed; the next call picks them up.
+        stop, prefix_hash = _settled_prefix(path)
+        tail_only = self.offset is not None and self._prefix_unchanged(path) and self._continues(path)
+        if tail_only:
+            if stop > self.offset:
+                raw = pd.read_csv(_byte_range(path, self.offset, stop), sep='\t', header=None, names=self.columns)
+            else:
+                raw = pd.DataFrame(columns=self.columns)
+        else:
+            raw = pd.read_csv(_byte_range(path, 0, stop), sep='\t')
+            if self.columns is None:
+                self.columns = list(raw.columns)
+                self.text_columns = [c for c in raw.columns if not pd.api.types.is_numeric_dtype(raw[c])]
+        raw = self._normalize(raw)
+        raw.index = self._keys(raw['Id'], tail_only)
+        self.offset, self.prefix_hash = stop, prefix_hash
+        return raw, tail_only
+
+    def _prefix_unchanged(self, path):
+        digest = hashlib.sha256()
+        remaining = self.offset
+        with open(path, 'rb') as fh:
+            while remaining:
+                block = fh.read(min(_BLOCK_SIZE, remaining))
+                if not block:
+                    return False
+                digest.update(block)
+                remaining -= len(block)
+        return digest.hexdigest() == self.prefix_hash
+
+    def _continues(self, path):
+        # A last line taken without its newline must be followed by one, not by more of itself.
+        with open(path, 'rb') as fh:
+            fh.seek(self.offset - 1)
+            last, following = fh.read(1), fh.read(1)
+        return last == b'\n' or following in (b'', b'\r', b'\n')
+
+    def _normalize(self, raw):
+        # Tail chunks infer their own dtypes; pin them so row hashes stay comparable.
+        numeric = [c for c in raw.columns if c not in self.text_columns]
+        raw = raw.copy()
+        raw[numeric] = raw[numeric].apply(pd.to_numeric, errors='coerce').astype(float)
+        raw[self.text_columns] = raw[self.text_columns].astype(object)
+        return raw
+
+    def _keys(self, ids, tail_only):
+        ids = ids.fillna(-1).astype('int64')
+        keys = ids * _OCCURRENCES + ids.groupby(ids).cumcount()
+        if tail_only:
+            # Continue the occurrence count of the Ids ingested before.
+            seen = pd.Series(self.row_hashes.index // _OCCURRENCES).value_counts()
+            keys = keys + ids.map(seen).fillna(0).astype('int64')
+        return pd.Index(keys, name='key')
+
+    def _clean(self, raw):
+        df = raw.drop(columns=COL_DROP)
+        df = df.astype(_FLOAT32)
+        df[FLOAT_TO_INT] = df[FLOAT_TO_INT].fillna(0).astype({col: INT_DTYPES[col] for col in FLOAT_TO_INT})
+        df = df[df['Tsunami Event Validity'].isin(KEEP_VALIDITY)].copy()
+        # Group keys must match the ones the full clean uses for its means.
+        df['Location Name'] = df['Location Name'].fillna('In New Zealand')
+        return df
+
+    def _retract(self, keys):
+        if len(keys):
+            observed = self.frame.loc[keys, IMPUTED_COLUMNS].mask(self.imputed.loc[keys])
+            observed[GEO_LEVELS] = self.frame.loc[keys, GEO_LEVELS]
+            self.aggregates.observe(observed, sign=-1)
+
+    def _impute(self, df):
+        flags = df[IMPUTED_COLUMNS].isna()
+        df[REPLACE_WITH_MEDIAN] = df[REPLACE_WITH_MEDIAN].fillna(self.aggregates.median_fills())
+        df = fill_defaults(df)
+        df[COORDINATES] = df[COORDINATES].fillna(self.aggregates.coordinate_fills(df))
+        return df, flags
+
+    def _reimpute(self, tolerance):
+        fills = self.aggregates.coordinate_fills(self.frame)
+        for col, median in self.aggregates.median_fills().items():
+            fills[col] = median
+        fills = fills[IMPUTED_COLUMNS]
+        current = self.frame[IMPUTED_COLUMNS]
+        moved = self.imputed & ((fills - current).abs() > tolerance)
+        self.frame[IMPUTED_COLUMNS] = current.mask(moved, fills)
+        return int(moved.to_numpy().sum())
+
+
+def _settled_prefix(path):
+    """Return the offset just past the last complete line and the digest of the bytes before it.
+
+    A last line without a newline counts as complete when it has as many
+    fields as the header and no open quote, which is how the NOAA export ends.
+    """
+    digest = hashlib.sha256()
+    offset = position = 0
+    pending = b''
+    with open(path, 'rb') as fh:
+        header = fh.readline()
+        fh.seek(0)
+        for block in iter(lambda: fh.read(_BLOCK_SIZE), b''):
+            cut = block.rfind(b'\n')
+            if cut < 0:
+                pending += block
+            else:
+                digest.update(pending + block[:cut + 1])
+                pending = block[cut + 1:]
+                offset = position + cut + 1
+            position += len(block)
+    if pending and header.endswith(b'\n') and _complete(pending, header):
+        digest.update(pending)
+        offset = position
+    return offset, digest.hexdigest()
+
+
+def _complete(line, header):
+    # Tabs inside quoted text do not separate fields.
+    fields = [re.sub(rb'"[^"]*"', b'', text).count(b'\t') for text in (line, header)]
+    return line.count(b'"') % 2 == 0 and fields[0] == fields[1]
+
+
+def _byte_range(path, start, stop):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        return io.BytesIO(fh.read(stop - start))
+
+
+def ingest(path=RAW_DATA, state_path=DEFAULT_STATE_PATH, export_paths=EXPORT_PATHS,
+           columnar=CLEANED_BASE, reimpute_tolerance=None):
+    """Ingest the new or changed events of ``path`` and return the cleaned frame.
+
+    The first call cleans everything and (re)writes ``export_paths``; later calls
+    append the new rows to them, or rewrite them when older rows changed or
+    were re-imputed. The typed binary copies at ``columnar`` are rewritten
+    whenever the data changed, and appended rows are folded into the cube.
+    """
+    fresh = not os.path.exists(state_path)
+    state = IncrementalState() if fresh else IncrementalState.load(state_path)
+    summary = state.update(path, reimpute_tolerance)
+    cleaned = state.cleaned()
+    # Files this state did not write (e.g. from clean_pipeline) are replaced, never appended to.
+    if fresh or summary['rewrite'] or not all(os.path.exists(p) for p in export_paths):
+        export(cleaned, export_paths, columnar=None)
+        tail = None
+    else:
+        tail = cleaned.iloc[len(cleaned) - summary['appended']:]
+        for p in export_paths:
+            tail.to_csv(p, mode='a', header=False, index=True)
+    if columnar and (tail is None or len(tail)):
+        write_columnar(cleaned, columnar)
+        _update_cube(cube_path(columnar), state, cleaned, tail)
+    state.save(state_path)
+    return cleaned
+
+
+def _update_cube(path, state, cleaned, tail):
+    # Only a cube this state wrote for the rows before ``tail`` can be extended with it.
+    cube = AggregateCube.load(path) if tail is not None and os.path.exists(path) else None
+    if cube is not None and getattr(cube, 'source', None) == (state.token, len(cleaned) - len(tail)):
+        cube.add(tail)
+    else:
+        cube = AggregateCube.from_frame(cleaned)
+    cube.source = (state.token, len(cleaned))
+    cube.save(path)
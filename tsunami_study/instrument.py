@@ -0,0 +1,211 @@
+"""Per-stage timing, memory and data-quality metrics.
+
+An :class:`Instrument` passed to :func:`~tsunami_study.pipeline.run_stages`
+(or :func:`~tsunami_study.pipeline.clean_pipeline`) wraps every computed
+stage and records
+
+* wall time,
+* resident memory before the stage and its peak during the stage,
+* rows in and out, and the nulls filled per column.
+
+Each record is logged as one JSON line on the ``tsunami_study.metrics``
+logger, kept in :attr:`Instrument.records` and, with ``path``, appended to a
+JSON lines file. This replaces the ``df.info()`` calls between steps and is
+cheap enough to leave on: null counts are computed once per frame, and the
+peak comes from a thread reading the resident size every ``memory_interval``
+seconds. When a stage pushes the process past its previous high-water mark,
+that mark is the exact peak. The mark itself is never reset, so other
+peak-memory monitoring in the same process is unaffected.
+
+``profile='<stage>'`` additionally samples the call stack of that one stage
+from a background thread and writes it in the collapsed format read by
+flamegraph tools.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+metrics_logger = logging.getLogger('tsunami_study.metrics')
+
+DEFAULT_PROFILE_DIR = os.path.join('.tsunami_cache', 'profiles')
+
+
+class Instrument:
+    """Collects one metrics record per pipeline stage."""
+
+    def __init__(self, path=None, profile=None, profile_dir=DEFAULT_PROFILE_DIR, interval=0.001,
+                 memory_interval=0.005):
+        self.path = path
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.interval = interval
+        self.memory_interval = memory_interval
+        self.records = []
+        self._last = (None, None)
+
+    def run(self, name, func, df, params):
+        """Return ``func(df, **params)``, recording the metrics of the call as stage ``name``."""
+        framed = isinstance(df, pd.DataFrame)
+        nulls_in = self._nulls(df) if framed else None
+        rss = _rss_mib()
+        sampler = _Sampler(self.interval) if name == self.profile else None
+        memory = _PeakMemory(self.memory_interval)
+        start = time.perf_counter()
+        with memory, sampler or nullcontext():
+            out = func(df, **params)
+        seconds = time.perf_counter() - start
+        peak = memory.peak
+
+        nulls_out = self._nulls(out)
+        filled = {}
+        if framed and len(out) == len(df):
+            # Only a stage that keeps every row can be said to fill nulls.
+            change = nulls_in.reindex(nulls_out.index) - nulls_out
+            filled = {col: int(n) for col, n in change.items() if n > 0}
+        record = {
+            'stage': name,
+            'seconds': round(seconds, 6),
+            'rss_mib': None if rss is None else round(rss, 1),
+            'peak_mib': None if peak is None else round(peak, 1),
+            'rows_in': len(df) if framed else None,
+            'rows_out': len(out),
+            'nulls_out': int(nulls_out.sum()),
+            'nulls_filled': filled,
+        }
+        if sampler is not None:
+            record['profile'] = sampler.write(os.path.join(self.profile_dir, f'{name}.folded'))
+        self.emit(record)
+        return out
+
+    def cached(self, name):
+        """Record that stage ``name`` was served from the cache."""
+        self.emit({'stage': name, 'cached': True})
+
+    def emit(self, record):
+        self.records.append(record)
+        line = json.dumps(record)
+        metrics_logger.info(line)
+        if self.path:
+            with open(self.path, 'a') as fh:
+                fh.write(line + '\n')
+
+    def _nulls(self, df):
+        # The output of one stage is the input of the next; count its nulls once.
+        frame, nulls = self._last
+        if frame is not df:
+            nulls = df.isna().sum()
+            self._last = (df, nulls)
+        return nulls
+
+
+class _Sampler:
+    """Samples the stack of the thread that entered it, every ``interval`` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as fh:
+            fh.writelines(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+        logger.info('profile: %d samples written to %s', sum(self.stacks.values()), path)
+        return path
+
+
+class _PeakMemory:
+    """Highest resident size, in MiB, seen while the block runs."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.peak = None
+        self._mark = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._mark = _peak_mib()
+        self.peak = _rss_mib()
+        if _status_mib('VmRSS:') is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._observe(_rss_mib())
+        mark = _peak_mib()
+        if mark is not None and self._mark is not None and mark > self._mark:
+            # A new high-water mark was set during the block; it is the exact peak.
+            self._observe(mark)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._observe(_status_mib('VmRSS:'))
+
+    def _observe(self, mib):
+        if mib is not None:
+            self.peak = mib if self.peak is None else max(self.peak, mib)
+
+
+def _status_mib(field):
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _rss_mib():
+    rss = _status_mib('VmRSS:')
+    return rss if rss is not None else _peak_mib()
+
+
+def _peak_mib():
+    peak = _status_mib('VmHWM:')
+    if peak is not None or resource is None:
+        return peak
+    # Elsewhere only the lifetime peak is available (KiB on Linux, bytes on macOS).
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 1024
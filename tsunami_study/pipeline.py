@@ -0,0 +1,288 @@
+"""Cleaning pipeline for the NOAA tsunami event TSV.
+
+The cleaning rules from ``Tsunami Study (Python).py`` are split into named
+stages (load, drop, cast, filter, median_fill, fill_defaults, geo_fill,
+export). Each stage's
+output is cached on disk under a key chained from the hash of the raw file,
+the parameters and source of every stage up to it, so a rerun only pays for
+the stages whose inputs changed.
+"""
+
+import logging
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+from .cache import StageCache, hash_file, stage_key
+from .cube import AggregateCube, cube_path
+from .impute import hierarchical_fill
+from .schema import INT_DTYPES, read_tsv
+from .storage import CLEANED_BASE, columnar_paths, write_columnar
+
+logger = logging.getLogger(__name__)
+
+RAW_DATA = 'Tsunami(1750-present).tsv'
+EXPORT_PATHS = ('CleanedTsunamiDataIndex', 'CleanedTsunamiDataIndex.CSV')
+DEFAULT_CACHE_DIR = '.tsunami_cache'
+
+# Dropped Column Name                   Reason
+# Unnamed: 0                            Column contain no data
+# Id                                    Does not provide any useful information for the analysis
+# Hr                                    This degree of time information is not required
+# Mn                                    This degree of time information is not required
+# Sec                                   This degree of time information is not required
+# Vol                                   Source data set provides a link to information about volcanic eruption pertaining to the tsunami event.
+# More Info                             Source data set provides a link with more information about the specific event.
+# Tsunami Magnitude (Abe)               99.9% missing values
+# Warn Status                           97% missing values
+# Missing                               99.8% missing values
+# Missing Description                   99.8% missing values
+# Injuries                              96.8% missing values
+# Injuries Description                  96.3% missing values
+# Houses Destroyed                      96.5% missing values
+# Houses Destroyed Description          90.5% missing values
+# Houses Damaged                        99.3% missing values
+# Houses Damaged Description            97.4% missing values
+# Total ...                             Total data columns will be dropped (Tsunami Only)
+COL_DROP = [
+    'Unnamed: 0',
+    'Id',
+    'Hr',
+    'Mn',
+    'Sec',
+    'Vol',
+    'More Info',
+    'Tsunami Magnitude (Abe)',
+    'Warn Status',
+    'Missing',
+    'Missing Description',
+    'Injuries',
+    'Injuries Description',
+    'Houses Destroyed',
+    'Houses Destroyed Description',
+    'Houses Damaged',
+    'Houses Damaged Description',
+    'Total Deaths',
+    'Total Death Description',
+    'Total Missing',
+    'Total Missing Description',
+    'Total Injuries',
+    'Total Injuries Description',
+    'Total Damage ($Mil)',
+    'Total Damage Description',
+    'Total Houses Destroyed',
+    'Total Houses Destroyed Description',
+    'Total Houses Damaged',
+    'Total Houses Damaged Description',
+]
+
+FLOAT_TO_INT = [
+    'Year',
+    'Mo',
+    'Dy',
+    'Deposits',
+    'Number of Runups',
+    'Deaths',
+]
+
+FLOAT_TO_CATEGORY = [
+    'Tsunami Event Validity',
+    'Tsunami Cause Code',
+    'Region',
+    'Death Description',
+    'Damage Description',
+]
+
+# Tsunami Event Validity, valid values -1 to 4:
+# -1 erroneous entry, 0 seiche or disturbance in an inland river/lake,
+# 1 very doubtful, 2 questionable, 3 probable, 4 definite tsunami.
+# We only keep events with values 2 and higher.
+KEEP_VALIDITY = [2, 3, 4]
+
+# Measurements of the natural phenomena are filled with the column median,
+# a robust estimate of location.
+REPLACE_WITH_MEDIAN = [
+    'Earthquake Magnitude',
+    'Focal Depth (km)',
+    'Maximum Water Height (m)',
+    'Tsunami Magnitude (Iida)',
+    'Tsunami Intensity',
+]
+
+DESCRIPTION_COLUMNS = ['Death Description', 'Damage Description']
+
+# ``modules`` names the modules besides its own that a stage's function calls
+# into; editing them invalidates the stage's cached output.
+Stage = namedtuple('Stage', ['name', 'func', 'params', 'outputs', 'modules'])
+Stage.__new__.__defaults__ = ({}, (), ())
+
+
+def load(path, narrow=True, engine='c'):
+    """Read the raw NOAA TSV.
+
+    With ``narrow`` only the kept columns are parsed, straight into the
+    dtypes declared in :mod:`tsunami_study.schema`; otherwise all 51 columns
+    are read with inferred dtypes.
+    """
+    if narrow:
+        return read_tsv(path, engine=engine)
+    return pd.read_csv(path, sep='\t', engine=engine)
+
+
+def drop(df, columns=COL_DROP):
+    """Drop the columns that carry no usable information."""
+    return df.drop(columns=list(columns), errors='ignore')
+
+
+def cast(df, to_int=FLOAT_TO_INT, to_category=FLOAT_TO_CATEGORY):
+    """Correct the data types of the count and code columns."""
+    df = df.copy()
+    for col in to_int:
+        df[col] = df[col].fillna(0).astype(INT_DTYPES.get(col, 'int64'))
+    to_category = list(to_category)
+    df[to_category] = df[to_category].astype('category')
+    return df
+
+
+def filter_validity(df, keep=KEEP_VALIDITY):
+    """Keep only the events whose validity rating is in ``keep``."""
+    return df[df['Tsunami Event Validity'].isin(list(keep))]
+
+
+def impute(df, median_columns=REPLACE_WITH_MEDIAN):
+    """Fill the missing measurements, Area, Location Name, damage and descriptions."""
+    return fill_defaults(fill_medians(df, median_columns)).reset_index(drop=True)
+
+
+def fill_medians(df, median_columns=REPLACE_WITH_MEDIAN):
+    """Fill the missing measurements with their column median."""
+    df = df.copy()
+    median_columns = list(median_columns)
+    df[median_columns] = df[median_columns].fillna(df[median_columns].median())
+    return df
+
+
+def fill_defaults(df):
+    """Fill Area, Location Name, damage and descriptions with their fixed defaults."""
+    df = df.copy()
+    # Area is only given for the US and Canada, 'NA' stands for not applicable.
+    df['Area'] = fill_label(df['Area'], 'NA')
+    # The only event without a Location Name is in New Zealand.
+    df['Location Name'] = fill_label(df['Location Name'], 'In New Zealand')
+    # No recorded damage is assumed to be less than 1 million USD.
+    df['Damage ($Mil)'] = df['Damage ($Mil)'].fillna(0.00)
+    # 1 covers "Few (~1 to 50 deaths)" and "LIMITED (less than $1 million)".
+    df[DESCRIPTION_COLUMNS] = df[DESCRIPTION_COLUMNS].fillna(1)
+    return df
+
+
+def fill_label(series, label):
+    """``fillna`` that also works on categoricals lacking ``label``."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and label not in series.cat.categories:
+        series = series.cat.add_categories([label])
+    return series.fillna(label)
+
+
+def geo_fill(df):
+    """Fill Latitude/Longitude from the same Location Name, then Country, then the median."""
+    df, report = hierarchical_fill(df.reset_index(drop=True))
+    logger.info('geo_fill rows filled per level:\n%s', report)
+    return df
+
+
+def export(df, paths=EXPORT_PATHS, columnar=CLEANED_BASE):
+    """Write the cleaned frame to every CSV in ``paths`` and the typed copies and cube at ``columnar``."""
+    for path in paths:
+        df.to_csv(path, index=True)
+    if columnar:
+        write_columnar(df, columnar)
+        AggregateCube.from_frame(df).save(cube_path(columnar))
+    return df
+
+
+def default_stages(keep=KEEP_VALIDITY, export_paths=EXPORT_PATHS, columnar=CLEANED_BASE):
+    """Return the stages that reproduce the original cleaning script."""
+    export_paths = tuple(export_paths)
+    outputs = export_paths + tuple(columnar_paths(columnar) + [cube_path(columnar)] if columnar else ())
+    return [
+        Stage('drop', drop, {'columns': COL_DROP}),
+        Stage('cast', cast, {'to_int': FLOAT_TO_INT, 'to_category': FLOAT_TO_CATEGORY},
+              modules=(read_tsv.__module__,)),
+        Stage('filter', filter_validity, {'keep': list(keep)}),
+        Stage('median_fill', fill_medians, {'median_columns': REPLACE_WITH_MEDIAN}),
+        Stage('fill_defaults', fill_defaults),
+        Stage('geo_fill', geo_fill, modules=(hierarchical_fill.__module__,)),
+        Stage('export', export, {'paths': export_paths, 'columnar': columnar}, outputs,
+              (write_columnar.__module__, AggregateCube.__module__)),
+    ]
+
+
+def run_stages(path, stages, cache=None, load_params=None, instrument=None):
+    """Run ``load`` followed by ``stages``, reusing cached outputs where possible.
+
+    Keys are computed up front, so the pipeline resumes from the latest stage
+    with a cached output and never loads the intermediate ones. An
+    :class:`~tsunami_study.instrument.Instrument` records the metrics of
+    every stage.
+    """
+    load_params = load_params or {}
+    key = stage_key('load', hash_file(path), load_params, load, (read_tsv.__module__,))
+    keys = [key]
+    for stage in stages:
+        key = stage_key(stage.name, key, stage.params, stage.func, stage.modules)
+        keys.append(key)
+    names = ['load'] + [stage.name for stage in stages]
+
+    df, start = None, 0
+    if cache is not None:
+        for i in range(len(names) - 1, -1, -1):
+            outputs = stages[i - 1].outputs if i > 0 else ()
+            # Files rewritten since (e.g. by ingest or stream_clean) make the entry stale.
+            if outputs and cache.get(f'{names[i]}.outputs', keys[i]) != _fingerprint(outputs):
+                continue
+            df = cache.get(names[i], keys[i])
+            if df is not None:
+                logger.info('stage %s: cached', names[i])
+                if instrument is not None:
+                    instrument.cached(names[i])
+                start = i + 1
+                break
+
+    for i in range(start, len(names)):
+        if i == 0:
+            func, df, params = load, path, load_params
+        else:
+            stage = stages[i - 1]
+            func, params = stage.func, stage.params
+        df = func(df, **params) if instrument is None else instrument.run(names[i], func, df, params)
+        logger.info('stage %s: computed (%d rows)', names[i], len(df))
+        if cache is not None:
+            cache.put(names[i], keys[i], df)
+            if i > 0 and stages[i - 1].outputs:
+                cache.put(f'{names[i]}.outputs', keys[i], _fingerprint(stages[i - 1].outputs))
+    return df
+
+
+def _fingerprint(paths):
+    """Return the ``(mtime_ns, size)`` of every file in ``paths``, or None if one is missing."""
+    try:
+        return [(stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths)]
+    except FileNotFoundError:
+        return None
+
+
+def clean_pipeline(path=RAW_DATA, keep=KEEP_VALIDITY, export_paths=EXPORT_PATHS,
+                   columnar=CLEANED_BASE, cache_dir=DEFAULT_CACHE_DIR, use_cache=True,
+                   narrow=True, engine='c', instrument=None):
+    """Clean the NOAA tsunami TSV at ``path`` and return the cleaned frame.
+
+    The CSVs go to ``export_paths`` and the typed binary copies next to
+    ``columnar`` (``None`` skips them). ``narrow`` and ``engine`` are passed
+    to :func:`load`. Stage outputs are cached in ``cache_dir``; pass
+    ``use_cache=False`` to run every stage from scratch without touching the
+    cache. ``instrument`` records per-stage metrics, see :mod:`tsunami_study.instrument`.
+    """
+    cache = StageCache(cache_dir) if use_cache else None
+    load_params = {'narrow': narrow, 'engine': engine}
+    return run_stages(path, default_stages(keep, export_paths, columnar), cache, load_params, instrument)
@@ -0,0 +1,138 @@
+"""Headless, parallel rendering of the univariate and top-category figures.
+
+:func:`render_report` draws the same figures as the study script, a
+histogram plus boxplot per numerical column and a top-N countplot per
+categorical column, optionally once per Region, decade or any other group,
+and writes them as PNG/SVG files. Figures are built on bare
+:class:`matplotlib.figure.Figure` objects, so no interactive backend or
+pyplot state is involved, and rendered across a process pool.
+
+Each figure only depends on its column slice. The key of a figure is the
+hash of that slice together with the figure kind, its parameters and the
+drawing code, and is kept in a manifest next to the files, so a rerun only
+redraws the figures whose data changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.figure import Figure
+
+from .cache import hash_function, hash_params
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = '.figures.json'
+FORMATS = ('png',)
+
+
+def draw_univariate(fig, series):
+    """Histogram and boxplot of ``series`` side by side on ``fig``."""
+    hist_ax, box_ax = fig.subplots(1, 2)
+    # Series.hist insists on the pyplot current figure, so use the Axes directly.
+    hist_ax.hist(series.dropna(), bins=10)
+    hist_ax.set_ylabel('count')
+    sns.boxplot(x=series, ax=box_ax)
+
+
+def draw_top_categories(ax, series, N=5):
+    """Countplot of the ``N`` most frequent values of ``series``, annotated with their share."""
+    top_categories = series.value_counts().nlargest(N).index
+    ax.set_title(f'Top {N} categories for {series.name}')
+    sns.countplot(x=series[series.isin(top_categories)], color='blue', order=top_categories, ax=ax)
+    total_entries = len(series)
+    for p in ax.patches:
+        percentage = f'{100 * p.get_height() / total_entries:.1f}%'
+        ax.annotate(percentage, (p.get_x() + p.get_width() / 2., p.get_height()), ha='center', va='center',
+                    xytext=(0, 10), textcoords='offset points')
+
+
+def figure_kinds(df):
+    """Yield ``(kind, column)`` for every figure of ``df``."""
+    for col in df.select_dtypes(include=np.number).columns:
+        yield 'univariate', col
+    for col in df.select_dtypes(include=['object', 'category', 'string']).columns:
+        yield 'top_categories', col
+
+
+def render_report(df, out_dir='report', formats=FORMATS, group_by=None, top_n=5, processes=None):
+    """Render every figure of ``df`` into ``out_dir`` and return ``(rendered, cached)`` counts.
+
+    ``group_by`` names a column (or ``'decade'``, derived from Year) to render
+    one set of figures per group in ``out_dir/<group_by>=<value>/``.
+    ``processes`` sizes the process pool (default: one per CPU).
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+
+    tasks, keys, cached = [], {}, 0
+    for subdir, frame in _groups(df, out_dir, group_by):
+        for kind, col in figure_kinds(frame):
+            series = frame[col].reset_index(drop=True)
+            key = _figure_key(kind, series, top_n)
+            paths = [os.path.join(subdir, f'{kind}-{_slug(col)}.{fmt}') for fmt in formats]
+            if all(manifest.get(p) == key and os.path.exists(p) for p in paths):
+                cached += 1
+                continue
+            tasks.append((kind, series, top_n, paths))
+            keys.update(dict.fromkeys(paths, key))
+
+    if tasks:
+        with ProcessPoolExecutor(processes) as pool:
+            for paths in pool.map(_render, tasks):
+                manifest.update({p: keys[p] for p in paths})
+        os.makedirs(out_dir, exist_ok=True)
+        with open(manifest_path, 'w') as fh:
+            json.dump(manifest, fh, indent=1, sort_keys=True)
+    logger.info('render_report: %d figures rendered, %d cached', len(tasks), cached)
+    return len(tasks), cached
+
+
+def _groups(df, out_dir, group_by):
+    if group_by is None:
+        yield out_dir, df
+        return
+    keys = df['Year'] // 10 * 10 if group_by == 'decade' and 'decade' not in df else df[group_by]
+    for value, frame in df.groupby(keys, observed=True):
+        yield os.path.join(out_dir, f'{group_by}={_slug(value)}'), frame
+
+
+def _figure_key(kind, series, top_n):
+    data = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    draw = draw_univariate if kind == 'univariate' else draw_top_categories
+    return hash_params({
+        'kind': kind,
+        'name': str(series.name),
+        'dtype': str(series.dtype),
+        'data': hashlib.sha256(data.tobytes()).hexdigest(),
+        'top_n': top_n if kind == 'top_categories' else None,
+        'code': hash_function(draw),
+    })
+
+
+def _render(task):
+    kind, series, top_n, paths = task
+    if kind == 'univariate':
+        fig = Figure(figsize=(15, 4))
+        draw_univariate(fig, series)
+    else:
+        fig = Figure(figsize=(8, 6))
+        draw_top_categories(fig.subplots(), series, top_n)
+    for path in paths:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fig.savefig(path)
+    return paths
+
+
+def _slug(value):
+    return re.sub(r'[^0-9A-Za-z.]+', '_', str(value)).strip('_')
@@ -0,0 +1,76 @@
+"""Declared schema for the NOAA tsunami event TSV.
+
+Only the 22 columns that survive ``COL_DROP`` are parsed, each straight into
+a narrow dtype: float32 for the measurements, codes and counts, categoricals
+for the text labels. The date and count columns have nulls, and the C parser
+is more than twice as slow with nullable integer dtypes, so they are parsed
+as float32 (exact for every value in the feed) and the cast stage gives them
+their final :data:`INT_DTYPES` widths once the nulls are zeroed. Latitude and
+Longitude stay float64 so the coordinate means and spatial queries keep their
+precision.
+"""
+
+import pandas as pd
+
+# Raw column -> dtype at parse time, in file order.
+TSV_SCHEMA = {
+    'Year': 'float32',
+    'Mo': 'float32',
+    'Dy': 'float32',
+    'Tsunami Event Validity': 'float32',
+    'Tsunami Cause Code': 'float32',
+    'Earthquake Magnitude': 'float32',
+    'Focal Depth (km)': 'float32',
+    'Deposits': 'float32',
+    'Country': 'category',
+    'Area': 'category',
+    'Region': 'float32',
+    'Location Name': 'category',
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+    'Maximum Water Height (m)': 'float32',
+    'Number of Runups': 'float32',
+    'Tsunami Magnitude (Iida)': 'float32',
+    'Tsunami Intensity': 'float32',
+    'Deaths': 'float32',
+    'Death Description': 'float32',
+    'Damage ($Mil)': 'float32',
+    'Damage Description': 'float32',
+}
+
+# Widths the cast stage gives the count columns once their nulls are zeroed.
+INT_DTYPES = {
+    'Year': 'int16',
+    'Mo': 'int8',
+    'Dy': 'int8',
+    'Deposits': 'int16',
+    'Number of Runups': 'int32',
+    'Deaths': 'int32',
+}
+
+def read_tsv(path, columns=None, engine='c', **kwargs):
+    """Read ``columns`` (default: every schema column) of the TSV at ``path``.
+
+    ``engine='pyarrow'`` uses the multithreaded Arrow parser when it is
+    installed. Columns outside :data:`TSV_SCHEMA` are read with inferred
+    dtypes, so extra keys such as ``Id`` can be requested too.
+    """
+    columns, dtypes = _columns(columns)
+    if engine == 'pyarrow':
+        # The Arrow parser cannot build categoricals directly.
+        df = pd.read_csv(path, sep='\t', usecols=columns, engine='pyarrow')
+        return df[columns].astype(dtypes)
+    return pd.read_csv(path, sep='\t', usecols=columns, dtype=dtypes, engine=engine, **kwargs)[columns]
+
+
+def iter_tsv(path, chunksize, columns=None):
+    """Yield the TSV at ``path`` in frames of ``chunksize`` rows, typed like :func:`read_tsv`."""
+    columns, dtypes = _columns(columns)
+    with pd.read_csv(path, sep='\t', usecols=columns, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk[columns]
+
+
+def _columns(columns):
+    columns = list(TSV_SCHEMA) if columns is None else list(columns)
+    return columns, {col: TSV_SCHEMA[col] for col in columns if col in TSV_SCHEMA}
@@ -0,0 +1,298 @@
+"""Local asyncio HTTP service over the cleaned events.
+
+The service cleans the TSV once (through the stage cache, so a restart on an
+unchanged file is instant) into an :class:`EventStore`: the cleaned frame in
+its narrow dtypes plus prebuilt indexes, so filters never scan the rows:
+
+* Year and Maximum Water Height (m) are kept as sorted orders, so a range
+  or threshold is two binary searches,
+* Country, Region and Tsunami Event Validity map every value to the
+  (ascending) positions of its events.
+
+Filters intersect those position sets. Matching rows are streamed back with
+chunked transfer encoding, ``chunk_rows`` at a time, as CSV or JSON lines.
+
+A background task polls the TSV and, when it changes, builds a new store in
+a worker thread and swaps it in. Requests use the store that was current
+when they started, so readers are never blocked and never see a half-built
+index.
+
+    python -m tsunami_study.service --port 8765
+    curl 'localhost:8765/events?country=JAPAN&year_min=1900&min_height=5&format=json'
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import RAW_DATA, clean_pipeline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_CHUNK_ROWS = 5000
+FORMATS = {'csv': 'text/csv', 'json': 'application/x-ndjson'}
+
+# Query parameter -> column for the exact-match filters.
+KEYED = {
+    'country': 'Country',
+    'region': 'Region',
+    'validity': 'Tsunami Event Validity',
+}
+
+
+class EventStore:
+    """Immutable snapshot of the cleaned events with filter indexes."""
+
+    def __init__(self, df, version=None):
+        self.frame = df.reset_index(drop=True)
+        self.version = version
+        self.loaded_at = time.time()
+        self.year = _SortedIndex(self.frame['Year'])
+        self.height = _SortedIndex(self.frame['Maximum Water Height (m)'])
+        self.keys = {param: _keyed_index(self.frame[col]) for param, col in KEYED.items()}
+
+    @classmethod
+    def from_pipeline(cls, path=RAW_DATA, **kwargs):
+        """Clean ``path`` (through the stage cache) and index the result."""
+        version = _file_version(path)
+        kwargs.setdefault('export_paths', ())
+        kwargs.setdefault('columnar', None)
+        return cls(clean_pipeline(path, **kwargs), version)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def query(self, year_min=None, year_max=None, min_height=None, **keyed):
+        """Return the ascending positions of the events matching every given filter.
+
+        ``keyed`` takes ``country``, ``region`` and ``validity``, each a value
+        or a list of values to accept.
+        """
+        sets = []
+        if year_min is not None or year_max is not None:
+            sets.append(self.year.between(year_min, year_max))
+        if min_height is not None:
+            sets.append(self.height.between(min_height, None))
+        for param, values in keyed.items():
+            if param not in self.keys:
+                raise KeyError(param)
+            if values is None:
+                continue
+            index = self.keys[param]
+            values = values if isinstance(values, (list, tuple)) else [values]
+            found = [index[v] for v in map(_key, values) if v in index]
+            sets.append(np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.intp))
+        if not sets:
+            return np.arange(len(self))
+        sets.sort(key=len)
+        positions = sets[0]
+        for other in sets[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def status(self):
+        return {
+            'rows': len(self),
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'memory_bytes': int(self.frame.memory_usage(deep=True).sum()),
+        }
+
+
+class _SortedIndex:
+    """Sorted order of one column, for range lookups by binary search."""
+
+    def __init__(self, series):
+        values = series.to_numpy(dtype=np.float64)
+        self.order = np.argsort(values, kind='stable')
+        self.values = values[self.order]
+
+    def between(self, low, high):
+        start = 0 if low is None else np.searchsorted(self.values, low, side='left')
+        stop = len(self.values) if high is None else np.searchsorted(self.values, high, side='right')
+        return np.sort(self.order[start:stop])
+
+
+def _keyed_index(series):
+    codes, uniques = pd.factorize(series)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {_key(value): order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+            if bounds[i] < bounds[i + 1]}
+
+
+def _key(value):
+    # Query strings are text; numeric codes such as Region 77.0 are matched as 77.
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value).upper()
+    return int(number) if number.is_integer() else number
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+
+class TsunamiService:
+    """HTTP front end over a hot-reloaded :class:`EventStore`."""
+
+    def __init__(self, path=RAW_DATA, host='127.0.0.1', port=DEFAULT_PORT, poll_interval=2.0,
+                 chunk_rows=DEFAULT_CHUNK_ROWS, **pipeline_kwargs):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.poll_interval = poll_interval
+        self.chunk_rows = chunk_rows
+        self.pipeline_kwargs = pipeline_kwargs
+        self.store = None
+        self.server = None
+        self._watcher = None
+
+    async def start(self):
+        """Load the store, start listening and start watching the TSV."""
+        self.store = await self._build()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._watcher = asyncio.create_task(self._watch())
+        logger.info('serving %d events on http://%s:%d', len(self.store), self.host, self.port)
+        return self
+
+    async def stop(self):
+        self._watcher.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def reload(self):
+        """Rebuild the store off the event loop and swap it in."""
+        store = await self._build()
+        self.store = store
+        logger.info('reloaded %d events (version %s)', len(store), store.version)
+        return store
+
+    async def _build(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: EventStore.from_pipeline(self.path, **self.pipeline_kwargs))
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if _file_version(self.path) != self.store.version:
+                    await self.reload()
+            except Exception:
+                # Keep serving the last good store; the next poll retries.
+                logger.exception('reload of %s failed', self.path)
+
+    async def _handle(self, reader, writer):
+        try:
+            request = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()).strip():
+                pass
+            if len(request) != 3:
+                return await _respond(writer, 400, {'error': 'malformed request'})
+            method, target, _ = request
+            if method != 'GET':
+                return await _respond(writer, 405, {'error': f'{method} not allowed'})
+            url = urlsplit(target)
+            params = parse_qs(url.query)
+            store = self.store
+            if url.path == '/status':
+                return await _respond(writer, 200, store.status())
+            if url.path != '/events':
+                return await _respond(writer, 404, {'error': f'no route {url.path}'})
+            try:
+                fmt, filters = _parse_filters(params)
+            except ValueError as exc:
+                return await _respond(writer, 400, {'error': str(exc)})
+            await self._stream(writer, store, store.query(**filters), fmt)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer, store, positions, fmt):
+        writer.write(_head(200, FORMATS[fmt], {'Transfer-Encoding': 'chunked', 'X-Rows': len(positions),
+                                               'X-Version': store.version}))
+        for start in range(0, max(len(positions), 1), self.chunk_rows):
+            rows = store.frame.iloc[positions[start:start + self.chunk_rows]]
+            if fmt == 'csv':
+                body = rows.to_csv(header=start == 0, index=True)
+            else:
+                body = (_shortest_floats(rows).to_json(orient='records', lines=True, double_precision=15)
+                        if len(rows) else '')
+            data = body.encode('utf-8')
+            if data:
+                writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+def _parse_filters(params):
+    def number(name, cast=float):
+        if name not in params:
+            return None
+        try:
+            return cast(params[name][-1])
+        except ValueError:
+            raise ValueError(f'{name} must be a number, got {params[name][-1]!r}') from None
+
+    fmt = params.get('format', ['csv'])[-1]
+    if fmt not in FORMATS:
+        raise ValueError(f'format must be one of {sorted(FORMATS)}')
+    filters = {'year_min': number('year_min'), 'year_max': number('year_max'), 'min_height': number('min_height')}
+    for param in KEYED:
+        filters[param] = params.get(param)
+    return fmt, filters
+
+
+def _shortest_floats(df):
+    # to_json writes float32 as its float64 expansion (7.0999999046); go through the
+    # shortest repr so JSON returns the same values as CSV.
+    narrow = df.select_dtypes('float32').columns
+    return df.assign(**{col: pd.to_numeric(df[col].astype(str)) for col in narrow})
+
+
+def _head(status, content_type, headers=None):
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}[status]
+    lines = [f'HTTP/1.1 {status} {reason}', f'Content-Type: {content_type}', 'Connection: close']
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def _respond(writer, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(_head(status, 'application/json', {'Content-Length': len(body)}) + body)
+    await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the cleaned tsunami events over HTTP.')
+    parser.add_argument('path', nargs='?', default=RAW_DATA)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(name)s: %(message)s')
+    service = TsunamiService(args.path, args.host, args.port, args.poll_interval, args.chunk_rows)
+    asyncio.run(service.serve_forever())
+
+
+if __name__ == '__main__':
+    main()
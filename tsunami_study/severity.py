@@ -0,0 +1,115 @@
+"""Composite severity score and top-K ranking of events.
+
+:func:`severity_score` maps each of the severity columns onto 0..1 over a
+fixed scale and returns their weighted mean, computed over the whole frame
+at once. The skewed columns (water height, runups, deaths) are
+log-scaled so a handful of record events do not flatten everyone else. The
+scales are fixed rather than taken from the frame, so scores of different
+chunks and catalogs can be compared and merged.
+
+:func:`top_k` returns the ``k`` most severe events overall, per region or per
+decade. It selects with ``np.argpartition`` in linear time instead of sorting
+every score, and only the ``k`` winners of each group are sorted.
+:class:`TopK` keeps the running winners across chunks, for catalogs read
+with :func:`~tsunami_study.schema.iter_tsv`.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Column -> (low, high) of the range mapped onto 0..1; values outside are clipped.
+SEVERITY_SCALES = {
+    'Maximum Water Height (m)': (0, 600),      # Lituya Bay 1958: 524.6 m
+    'Number of Runups': (0, 10_000),           # Tohoku 2011: 6317 runups
+    'Tsunami Magnitude (Iida)': (-5, 9),
+    'Tsunami Intensity': (-5, 9),              # Soloviev-Imamura scale
+    'Deaths': (0, 300_000),                    # Indian Ocean 2004: 227,899
+    'Damage Description': (0, 4),              # 0 none .. 4 extreme (>$25M)
+}
+LOG_SCALED = ['Maximum Water Height (m)', 'Number of Runups', 'Deaths']
+SEVERITY_WEIGHTS = dict.fromkeys(SEVERITY_SCALES, 1.0)
+
+
+def severity_score(df, weights=SEVERITY_WEIGHTS):
+    """Weighted mean of the normalized severity columns of ``df``, in 0..1.
+
+    Missing values are left out of an event's mean; events missing every
+    column score NaN.
+    """
+    columns = list(weights)
+    values = df[columns].astype('float64').to_numpy()
+    low, high = np.array([SEVERITY_SCALES[col] for col in columns], dtype=np.float64).T
+    logged = np.isin(columns, LOG_SCALED)
+    values[:, logged] = np.log1p(values[:, logged])
+    low[logged], high[logged] = np.log1p(low[logged]), np.log1p(high[logged])
+    scaled = np.clip((values - low) / (high - low), 0, 1)
+
+    w = np.array([weights[col] for col in columns], dtype=np.float64)
+    present = ~np.isnan(scaled)
+    with np.errstate(invalid='ignore'):
+        score = np.where(present, scaled, 0) @ w / (present @ w)
+    return pd.Series(score, index=df.index, name='severity')
+
+
+def top_k(df, k=10, by=None, scores=None):
+    """Return the ``k`` highest-scoring events of ``df``, overall or per group.
+
+    ``by`` is a column name, ``'decade'`` or None. ``scores`` defaults to
+    :func:`severity_score`. The result is ``df``'s rows with a ``severity``
+    column, ordered by group and then by descending score.
+    """
+    scores = severity_score(df) if scores is None else scores
+    values = np.asarray(scores, dtype=np.float64)
+    positions = np.flatnonzero(~np.isnan(values))
+    if by is None:
+        picked = _largest(values, positions, k)
+    else:
+        codes, groups = pd.factorize(_group_key(df, by)[positions], sort=True)
+        # Group codes are small integers, which numpy's stable sort handles in linear time.
+        order = np.argsort(codes.astype(np.int16 if len(groups) < 2 ** 15 else np.int64), kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+        picked = np.concatenate([_largest(values, positions[order[bounds[i]:bounds[i + 1]]], k)
+                                 for i in range(len(groups))] or [positions[:0]])
+    return df.iloc[picked].assign(severity=values[picked])
+
+
+class TopK:
+    """Running :func:`top_k` over a stream of chunks."""
+
+    def __init__(self, k=10, by=None, weights=SEVERITY_WEIGHTS):
+        self.k = k
+        self.by = by
+        self.weights = weights
+        self.best = None
+
+    def update(self, df):
+        # Scores are on fixed scales, so the winners of the union are among the winners of the parts.
+        best = top_k(df, self.k, self.by, severity_score(df, self.weights))
+        if self.best is not None:
+            # Back in row order, so ties still go to the earlier event.
+            best = pd.concat([self.best, best]).sort_index(kind='stable')
+            best = top_k(best, self.k, self.by, best['severity'])
+        self.best = best
+        return self
+
+    def result(self):
+        return self.best
+
+
+def _group_key(df, by):
+    if by == 'decade':
+        return (df['Year'] // 10 * 10).to_numpy()
+    return df[by].to_numpy()
+
+
+def _largest(values, positions, k):
+    """The ascending ``positions`` with the ``k`` largest ``values``, in descending order.
+
+    Ties, including ties at the cut, go to the earlier position.
+    """
+    if 0 < k < len(positions):
+        negated = -values[positions]
+        cut = np.partition(negated, k - 1)[k - 1]
+        above = negated < cut
+        positions = np.concatenate([positions[above], positions[negated == cut][:k - above.sum()]])
+    return positions[np.lexsort((positions, -values[positions]))][:max(k, 0)]
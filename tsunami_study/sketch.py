@@ -0,0 +1,92 @@
+"""Mergeable quantile sketch used to keep running medians.
+
+The sketch stores weighted bins. While a column has no more distinct
+values than ``max_bins`` every bin is an exact value and quantiles match
+``pandas.Series.quantile``; past that the bins are compressed into
+equal-weight centroids and quantiles become approximate. ``max_bins=None``
+never compresses, trading bounded memory for exact quantiles.
+"""
+
+import numpy as np
+
+
+class QuantileSketch:
+    """Weighted-bin quantile sketch supporting update, removal and merge."""
+
+    def __init__(self, max_bins=2048):
+        self.max_bins = max_bins
+        self.values = np.empty(0)
+        self.counts = np.empty(0)
+        self.exact = True
+
+    @property
+    def count(self):
+        return float(self.counts.sum())
+
+    def update(self, values, weights=None):
+        """Add the non-null entries of ``values``, each counted ``weights`` times."""
+        values = np.asarray(values, dtype=float).ravel()
+        weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=float).ravel()
+        keep = ~np.isnan(values) & (weights > 0)
+        if keep.any():
+            self._combine(values[keep], weights[keep])
+        return self
+
+    def remove(self, values):
+        """Retract ``values`` previously added, charging each to its nearest bin."""
+        values = _finite(values)
+        if values.size and self.values.size:
+            if self.values.size > 1:
+                pos = np.clip(np.searchsorted(self.values, values), 1, self.values.size - 1)
+                nearer_left = values - self.values[pos - 1] <= self.values[pos] - values
+                pos = np.where(nearer_left, pos - 1, pos)
+            else:
+                pos = np.zeros(values.size, dtype=int)
+            np.subtract.at(self.counts, pos, 1.0)
+            keep = self.counts > 0
+            self.values, self.counts = self.values[keep], self.counts[keep]
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        self.exact = self.exact and other.exact
+        self._combine(other.values, other.counts)
+        return self
+
+    def quantile(self, q):
+        """Return the ``q`` quantile with linear interpolation, NaN when empty."""
+        if not self.values.size:
+            return np.nan
+        cum = np.cumsum(self.counts)
+        pos = q * (cum[-1] - 1)
+        lo, hi = np.floor(pos), np.ceil(pos)
+        last = self.values.size - 1
+        lo_val = self.values[min(np.searchsorted(cum, lo, side='right'), last)]
+        hi_val = self.values[min(np.searchsorted(cum, hi, side='right'), last)]
+        return float(lo_val + (hi_val - lo_val) * (pos - lo))
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def _combine(self, values, counts):
+        values = np.concatenate([self.values, values])
+        counts = np.concatenate([self.counts, counts])
+        uniq, inverse = np.unique(values, return_inverse=True)
+        self.values, self.counts = uniq, np.bincount(inverse, weights=counts)
+        if self.max_bins and self.values.size > self.max_bins:
+            self._compress()
+
+    def _compress(self):
+        # Equal-weight partition of the cumulative counts, each part becomes a centroid.
+        cum = np.cumsum(self.counts)
+        part = np.minimum((cum - self.counts / 2) * self.max_bins // cum[-1], self.max_bins - 1).astype(int)
+        weights = np.bincount(part, weights=self.counts)
+        sums = np.bincount(part, weights=self.counts * self.values)
+        keep = weights > 0
+        self.values, self.counts = sums[keep] / weights[keep], weights[keep]
+        self.exact = False
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float).ravel()
+    return values[~np.isnan(values)]
@@ -0,0 +1,201 @@
+"""Spatial index over the event coordinates.
+
+:class:`SpatialIndex` buckets the Latitude/Longitude of the cleaned events
+into a regular degree grid stored in CSR layout: the points are sorted by
+cell and ``starts[cell]`` gives the first point of every cell. A contiguous
+run of longitude cells within one latitude row is then a contiguous slice of
+the sorted points, so a radius query gathers its candidates with a handful
+of slices and computes exact haversine distances on those only. k-nearest
+queries widen the radius until it holds ``k`` events.
+
+The batch queries work out the slices of every query point at once and
+expand them into flat (query, candidate) pairs, in runs of at most
+``_MAX_PAIRS`` pairs, so the distances, the radius test and the k-nearest
+selection of all points are single array operations. Only splitting the
+radius results into one sorted array per point is left to a loop.
+
+Results are positions into the arrays the index was built from, which for
+:meth:`SpatialIndex.from_frame` on a cleaned frame are its row labels.
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_CELL_DEG = 1.0
+
+# Most (query, candidate) distances the batch queries compute at once.
+_MAX_PAIRS = 1 << 22
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between points given in degrees (broadcasts)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class SpatialIndex:
+    """Grid index answering exact great-circle radius and k-nearest queries."""
+
+    def __init__(self, lat, lon, cell_deg=DEFAULT_CELL_DEG):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if np.isnan(lat).any() or np.isnan(lon).any():
+            raise ValueError('coordinates must not be missing, run geo_fill first')
+        self.cell_deg = cell_deg
+        self.rows = int(np.ceil(180 / cell_deg))
+        self.cols = int(np.ceil(360 / cell_deg))
+        cells = self._cells(lat, lon)
+        self.order = np.argsort(cells, kind='stable')
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.rows * self.cols + 1))
+        self.lat = np.radians(lat[self.order])
+        self.lon = np.radians(lon[self.order])
+        self.cos_lat = np.cos(self.lat)
+
+    @classmethod
+    def from_frame(cls, df, cell_deg=DEFAULT_CELL_DEG):
+        """Index the Latitude/Longitude columns of a cleaned frame."""
+        return cls(df['Latitude'], df['Longitude'], cell_deg)
+
+    def __len__(self):
+        return len(self.order)
+
+    def within(self, lat, lon, km):
+        """Return ``(distances, positions)`` of the events within ``km`` of a point, nearest first."""
+        candidates = self._candidates(lat, lon, km)
+        distances = self._distances(lat, lon, candidates)
+        inside = distances <= km
+        candidates, distances = candidates[inside], distances[inside]
+        nearest = np.argsort(distances, kind='stable')
+        return distances[nearest], self.order[candidates[nearest]]
+
+    def nearest(self, lat, lon, k=1):
+        """Return ``(distances, positions)`` of the ``k`` events closest to a point."""
+        k = min(k, len(self))
+        if not k:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        # Start from the radius that holds k events on average and double it.
+        km = 2 * EARTH_RADIUS_KM * np.sqrt(k / len(self))
+        while True:
+            distances, positions = self.within(lat, lon, km)
+            if len(distances) >= k:
+                return distances[:k], positions[:k]
+            km *= 2
+
+    def within_batch(self, lats, lons, km):
+        """:meth:`within` for many points; returns a list of ``(distances, positions)``."""
+        lats, lons = _points(lats, lons)
+        results = []
+        for lo, hi, queries, candidates, distances in self._pairs(lats, lons, km):
+            inside = distances <= km
+            splits = np.searchsorted(queries[inside], np.arange(lo + 1, hi))
+            for found, near in zip(np.split(distances[inside], splits), np.split(candidates[inside], splits)):
+                nearest = np.argsort(found, kind='stable')
+                results.append((found[nearest], self.order[near[nearest]]))
+        return results
+
+    def nearest_batch(self, lats, lons, k=1):
+        """:meth:`nearest` for many points; returns ``(distances, positions)`` of shape ``(n, k)``."""
+        lats, lons = _points(lats, lons)
+        k = min(k, len(self))
+        distances = np.empty((len(lats), k))
+        positions = np.empty((len(lats), k), dtype=np.intp)
+        todo = np.arange(len(lats)) if k else np.empty(0, dtype=np.intp)
+        km = 2 * EARTH_RADIUS_KM * np.sqrt(k / max(len(self), 1))
+        # As in nearest(), every round doubles the radius for the points with fewer than k events.
+        while len(todo):
+            short = []
+            for lo, hi, queries, candidates, found in self._pairs(lats[todo], lons[todo], km):
+                inside = found <= km
+                queries, candidates, found = queries[inside], candidates[inside], found[inside]
+                # Pairs come in index order, so ties go the same way as in nearest().
+                order = np.lexsort((found, queries))
+                queries, candidates, found = queries[order], candidates[order], found[order]
+                first = np.searchsorted(queries, np.arange(lo, hi + 1))
+                full = np.flatnonzero(np.diff(first) >= k)
+                take = (first[full][:, None] + np.arange(k)).ravel()
+                distances[todo[lo + full]] = found[take].reshape(-1, k)
+                positions[todo[lo + full]] = self.order[candidates[take]].reshape(-1, k)
+                short.append(lo + np.flatnonzero(np.diff(first) < k))
+            todo = todo[np.concatenate(short)]
+            km *= 2
+        return distances, positions
+
+    def _cells(self, lat, lon):
+        row = np.clip(np.floor((lat + 90) / self.cell_deg), 0, self.rows - 1).astype(np.int64)
+        col = np.clip(np.floor(((lon + 180) % 360) / self.cell_deg), 0, self.cols - 1).astype(np.int64)
+        return row * self.cols + col
+
+    def _candidates(self, lat, lon, km):
+        """Sorted-point indices of every cell the spherical cap around a point touches."""
+        _, begin, end = self._spans(np.array([lat], dtype=np.float64), np.array([lon], dtype=np.float64), km)
+        return _expand(begin, end)
+
+    def _pairs(self, lats, lons, km):
+        """Yield ``(lo, hi, queries, candidates, distances)`` for the points ``lo:hi``.
+
+        Every query point is paired with each of its candidates, by point and
+        then in index order; the points are cut into runs of at most
+        ``_MAX_PAIRS`` pairs.
+        """
+        query, begin, end = self._spans(lats, lons, km)
+        sizes = np.bincount(query, weights=end - begin, minlength=len(lats))
+        cuts = np.searchsorted(np.cumsum(sizes), np.arange(_MAX_PAIRS, sizes.sum(), _MAX_PAIRS), 'right')
+        edges = np.unique(np.concatenate([[0], cuts, [len(lats)]]))
+        bounds = np.searchsorted(query, edges)
+        for lo, hi, first, last in zip(edges[:-1], edges[1:], bounds[:-1], bounds[1:]):
+            queries = np.repeat(query[first:last], end[first:last] - begin[first:last])
+            candidates = _expand(begin[first:last], end[first:last])
+            yield lo, hi, queries, candidates, self._distances(lats[queries], lons[queries], candidates)
+
+    def _spans(self, lats, lons, km):
+        """``(query, begin, end)`` slices of the sorted points in the cells each point's cap touches.
+
+        The slices are ordered by point and then by position.
+        """
+        n = len(lats)
+        angle = km / EARTH_RADIUS_KM
+        if angle >= np.pi:
+            return np.arange(n), np.zeros(n, dtype=np.intp), np.full(n, len(self), dtype=np.intp)
+        dlat = np.degrees(angle)
+        low, high = lats - dlat, lats + dlat
+        row_low = np.maximum(np.floor((low + 90) / self.cell_deg).astype(np.int64), 0)
+        row_high = np.minimum(np.floor((high + 90) / self.cell_deg).astype(np.int64), self.rows - 1)
+        # Widest longitude offset of a cap that stays clear of the poles.
+        with np.errstate(divide='ignore'):
+            dlon = np.degrees(np.arcsin(np.minimum(np.sin(angle) / np.cos(np.radians(lats)), 1.0)))
+        # A cap over a pole spans every longitude.
+        every = (low <= -90) | (high >= 90) | (2 * dlon + self.cell_deg >= 360)
+        # Wrap in degrees, as the last column is narrower when cell_deg does not divide 360.
+        col_low, col_high = (np.minimum(np.floor(((edge + 180) % 360) / self.cell_deg).astype(np.int64),
+                                        self.cols - 1) for edge in (lons - dlon, lons + dlon))
+        col_low[every], col_high[every] = 0, self.cols - 1
+        wraps = col_low > col_high
+        # Per point and row, columns col_low..col_high, or col_low..end and 0..col_high when they wrap.
+        spans = [(col_low, np.where(wraps, self.cols, col_high + 1)),
+                 (np.zeros_like(col_low), np.where(wraps, col_high + 1, 0))]
+        query = np.repeat(np.arange(n), row_high - row_low + 1)
+        first = _expand(row_low, row_high + 1) * self.cols
+        begin = np.concatenate([self.starts[first + left[query]] for left, _ in spans])
+        end = np.concatenate([self.starts[first + right[query]] for _, right in spans])
+        query = np.concatenate([query, query])
+        keep = np.flatnonzero(end > begin)
+        keep = keep[np.lexsort((begin[keep], query[keep]))]
+        return query[keep], begin[keep], end[keep]
+
+    def _distances(self, lat, lon, candidates):
+        lat, lon = np.radians(lat), np.radians(lon)
+        a = (np.sin((self.lat[candidates] - lat) / 2) ** 2
+             + np.cos(lat) * self.cos_lat[candidates] * np.sin((self.lon[candidates] - lon) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _expand(begin, end):
+    """Concatenation of the ranges ``begin[i]:end[i]``."""
+    sizes = end - begin
+    offsets = np.repeat(begin - (np.cumsum(sizes) - sizes), sizes)
+    return np.arange(sizes.sum()) + offsets
+
+
+def _points(lats, lons):
+    return np.ravel(lats).astype(np.float64), np.ravel(lons).astype(np.float64)
@@ -0,0 +1,105 @@
+"""Typed binary copies of the cleaned data and a loader that prefers them.
+
+Next to the CSV exports the cleaned frame is written as
+
+* ``<base>.feather`` (uncompressed Arrow IPC, opened memory-mapped) and
+  ``<base>.parquet``, both keeping the category dtypes and integer widths;
+  these need ``pyarrow`` and are skipped without it,
+* ``<base>.npy``, the numeric columns as one column-major float64 block that
+  :func:`load_numeric` memory-maps,
+* ``<base>.schema.json``, the dtypes, categories and the column order of the
+  ``.npy`` block, used to restore dtypes when reading Parquet or the CSV.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+CLEANED_BASE = 'CleanedTsunamiDataIndex'
+FORMATS = ('feather', 'parquet', 'csv')
+
+
+def columnar_paths(base=CLEANED_BASE):
+    """Return the files :func:`write_columnar` produces in this environment."""
+    paths = [f'{base}.npy', f'{base}.schema.json']
+    if feather is not None:
+        paths += [f'{base}.feather', f'{base}.parquet']
+    return paths
+
+
+def write_columnar(df, base=CLEANED_BASE):
+    """Write the typed binary copies of ``df`` next to ``base``."""
+    df = df.reset_index(drop=True)
+    numeric = df.select_dtypes(include='number').columns.tolist()
+    np.save(f'{base}.npy', np.asfortranarray(df[numeric].to_numpy(dtype=np.float64)))
+    schema = {
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+        'categories': {
+            col: {'dtype': str(df[col].cat.categories.dtype), 'values': df[col].cat.categories.tolist()}
+            for col in df.select_dtypes('category')
+        },
+        'numeric': numeric,
+    }
+    with open(f'{base}.schema.json', 'w') as fh:
+        json.dump(schema, fh, indent=1)
+    if feather is None:
+        logger.warning('pyarrow is not installed, skipping %s.feather/.parquet', base)
+        return
+    feather.write_feather(df, f'{base}.feather', compression='uncompressed')
+    df.to_parquet(f'{base}.parquet', index=False)
+
+
+def load_cleaned(base=CLEANED_BASE, csv_path=None, formats=FORMATS):
+    """Load the cleaned frame from the fastest available format in ``formats``.
+
+    Binary copies older than the CSV (e.g. after an external edit) are
+    skipped. The CSV fallback restores the exported dtypes from the schema
+    sidecar and keeps the ``'NA'`` Area labels as text.
+    """
+    csv_path = csv_path or base
+    csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else 0
+    for fmt in formats:
+        path = csv_path if fmt == 'csv' else f'{base}.{fmt}'
+        if not os.path.exists(path) or (fmt != 'csv' and os.path.getmtime(path) < csv_mtime):
+            continue
+        if fmt == 'feather' and feather is not None:
+            return feather.read_table(path, memory_map=True).to_pandas()
+        if fmt == 'parquet' and feather is not None:
+            return _restore_dtypes(pd.read_parquet(path), base)
+        if fmt == 'csv':
+            df = pd.read_csv(path, index_col=0, keep_default_na=False, na_values=[''],
+                             float_precision='round_trip')
+            df.index.name = None
+            return _restore_dtypes(df, base)
+    raise FileNotFoundError(f'no cleaned data found for {base!r} in formats {formats}')
+
+
+def load_numeric(base=CLEANED_BASE):
+    """Memory-map the numeric block, returning ``(array, column_names)``."""
+    with open(f'{base}.schema.json') as fh:
+        numeric = json.load(fh)['numeric']
+    return np.load(f'{base}.npy', mmap_mode='r'), numeric
+
+
+def _restore_dtypes(df, base):
+    # Parquet only round-trips string dictionaries and CSV keeps no dtypes at all.
+    schema_path = f'{base}.schema.json'
+    if not os.path.exists(schema_path):
+        return df
+    with open(schema_path) as fh:
+        schema = json.load(fh)
+    dtypes = {col: dtype for col, dtype in schema['dtypes'].items() if col in df.columns}
+    for col, categories in schema['categories'].items():
+        if col in dtypes:
+            dtypes[col] = pd.CategoricalDtype(pd.Index(categories['values'], dtype=categories['dtype']))
+    return df.astype(dtypes)
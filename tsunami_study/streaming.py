@@ -0,0 +1,132 @@
+"""Two-pass streaming clean for catalogs that do not fit in memory.
+
+:func:`stream_clean` applies the same rules as :func:`clean_pipeline` while
+holding only one chunk of rows at a time:
+
+1. the first pass casts and filters every chunk and feeds the observed
+   values into a :class:`~tsunami_study.aggregates.RunningAggregates`
+   (median sketches and coordinate group sums),
+2. the second pass casts, filters and imputes every chunk against those
+   final aggregates and appends it to the output CSV.
+
+Apart from the chunk, memory grows only with the number of distinct groups
+and, with ``exact=True``, with the number of distinct measurement values.
+By default the median sketches are capped at ``max_bins`` bins, which makes
+the medians approximate once a column has more distinct values than that.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import RunningAggregates
+from .impute import COORDINATES
+from .pipeline import (
+    KEEP_VALIDITY,
+    RAW_DATA,
+    REPLACE_WITH_MEDIAN,
+    cast,
+    fill_defaults,
+    fill_label,
+    filter_validity,
+)
+from .schema import iter_tsv
+from .sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class StreamSummary:
+    """Chunk-mergeable replacement for ``describe(include='all')``."""
+
+    def __init__(self, max_bins=2048):
+        self.max_bins = max_bins
+        self.moments = {}
+        self.extremes = {}
+        self.sketches = {}
+        self.labels = {}
+
+    def update(self, df):
+        for col in df.select_dtypes(include='number').columns:
+            values = df[col].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if not values.size:
+                continue
+            n, mean = values.size, values.mean()
+            m2 = ((values - mean) ** 2).sum()
+            if col in self.moments:
+                # Chan et al. pairwise combination of (count, mean, M2).
+                n0, mean0, m20 = self.moments[col]
+                delta = mean - mean0
+                total = n0 + n
+                mean = mean0 + delta * n / total
+                m2 = m20 + m2 + delta ** 2 * n0 * n / total
+                n = total
+                lo, hi = self.extremes[col]
+                self.extremes[col] = (min(lo, values.min()), max(hi, values.max()))
+            else:
+                self.extremes[col] = (values.min(), values.max())
+                self.sketches[col] = QuantileSketch(self.max_bins)
+            self.moments[col] = (n, mean, m2)
+            self.sketches[col].update(values)
+        for col in df.select_dtypes(exclude='number').columns:
+            counts = df[col].value_counts()
+            self.labels[col] = counts if col not in self.labels else self.labels[col].add(counts, fill_value=0)
+
+    def describe(self):
+        rows = {}
+        for col, (n, mean, m2) in self.moments.items():
+            sketch = self.sketches[col]
+            rows[col] = {
+                'count': n, 'mean': mean, 'std': np.sqrt(m2 / (n - 1)) if n > 1 else np.nan,
+                'min': self.extremes[col][0], '25%': sketch.quantile(0.25),
+                '50%': sketch.quantile(0.5), '75%': sketch.quantile(0.75), 'max': self.extremes[col][1],
+            }
+        for col, counts in self.labels.items():
+            counts = counts[counts > 0]
+            rows[col] = {
+                'count': counts.sum(), 'unique': len(counts),
+                'top': counts.idxmax() if len(counts) else np.nan,
+                'freq': counts.max() if len(counts) else np.nan,
+            }
+        columns = ['count', 'unique', 'top', 'freq', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+        return pd.DataFrame.from_dict(rows, orient='index').reindex(columns=columns)
+
+
+def stream_clean(path=RAW_DATA, out_path='CleanedTsunamiDataIndex', chunksize=DEFAULT_CHUNKSIZE,
+                 keep=KEEP_VALIDITY, exact=False, max_bins=2048):
+    """Clean the TSV at ``path`` chunk by chunk into the CSV ``out_path``.
+
+    Returns the :class:`StreamSummary` description of the written rows.
+    """
+    aggregates = RunningAggregates(None if exact else max_bins)
+    for chunk in iter_tsv(path, chunksize):
+        aggregates.observe(_prepare(chunk, keep))
+    medians = aggregates.median_fills()
+    table = aggregates.coordinate_table()
+    logger.info('stream_clean medians:\n%s', medians)
+
+    summary = StreamSummary(None if exact else max_bins)
+    written = 0
+    with open(out_path, 'w', newline='') as out:
+        for i, chunk in enumerate(iter_tsv(path, chunksize)):
+            df = _prepare(chunk, keep)
+            df[REPLACE_WITH_MEDIAN] = df[REPLACE_WITH_MEDIAN].fillna(medians)
+            df = fill_defaults(df)
+            df[COORDINATES] = df[COORDINATES].fillna(aggregates.coordinate_fills(df, table))
+            df.index = pd.RangeIndex(written, written + len(df))
+            df.to_csv(out, header=i == 0, index=True)
+            summary.update(df)
+            written += len(df)
+    logger.info('stream_clean wrote %d rows to %s', written, out_path)
+    return summary.describe()
+
+
+def _prepare(chunk, keep):
+    df = filter_validity(cast(chunk), keep).copy()
+    # Group keys must match the ones the full clean uses for its means.
+    df['Location Name'] = fill_label(df['Location Name'], 'In New Zealand')
+    return df
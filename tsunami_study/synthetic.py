@@ -0,0 +1,73 @@
+"""Synthetic NOAA-schema catalogs for scaling tests.
+
+:func:`generate_catalog` writes a TSV with the same 51 columns, quoting and
+number formatting as the NOAA export, at any number of rows. Values are
+resampled from a source catalog (the real one by default), so every column
+keeps its null rate and value distribution:
+
+* the site columns (Country, Area, Region, Location Name, Latitude,
+  Longitude) are drawn together from one source event, which keeps the
+  ~880 locations in ~112 countries and their coordinates consistent,
+* the date and time columns are drawn together from one source event, and
+  so is every count with its description column,
+* every other column is drawn independently.
+
+Rows are written in chunks, so catalogs of tens of millions of rows never
+sit in memory.
+"""
+
+import csv
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import RAW_DATA
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = 500_000
+
+SITE_COLUMNS = ['Country', 'Area', 'Region', 'Location Name', 'Latitude', 'Longitude']
+TIME_COLUMNS = ['Year', 'Mo', 'Dy', 'Hr', 'Mn', 'Sec']
+
+
+def generate_catalog(path, rows, seed=0, source=RAW_DATA, chunksize=DEFAULT_CHUNKSIZE):
+    """Write a ``rows``-event catalog resampled from ``source`` to the TSV at ``path``."""
+    template = pd.read_csv(source, sep='\t')
+    groups = _column_groups(template.columns)
+    # Whole-number columns are written without a decimal point, like the export.
+    whole = [col for col in template.select_dtypes('number')
+             if col != 'Id' and np.array_equal(template[col].dropna(), template[col].dropna().round())]
+    text = template.select_dtypes(exclude='number').columns
+    rng = np.random.default_rng(seed)
+
+    with open(path, 'w', newline='') as out:
+        out.write('\t'.join(f'"{col}"' if col and not col.startswith('Unnamed') else '' for col in template.columns))
+        out.write('\n')
+        for start in range(0, rows, chunksize):
+            size = min(chunksize, rows - start)
+            chunk = {}
+            for group in groups:
+                picked = template[group].iloc[rng.integers(0, len(template), size)]
+                chunk.update({col: picked[col].to_numpy() for col in group})
+            chunk = pd.DataFrame(chunk, columns=template.columns)
+            chunk['Id'] = np.arange(start + 1, start + size + 1)
+            chunk[whole] = chunk[whole].astype('Int64')
+            for col in text:
+                chunk[col] = ('"' + chunk[col] + '"').fillna('')
+            chunk.to_csv(out, sep='\t', header=False, index=False, quoting=csv.QUOTE_NONE)
+    logger.info('generate_catalog wrote %d rows to %s', rows, path)
+    return path
+
+
+def _column_groups(columns):
+    """Split ``columns`` into the groups that are resampled from one source event."""
+    grouped = [SITE_COLUMNS, TIME_COLUMNS]
+    for described in columns[columns.str.endswith(' Description')]:
+        # 'Deaths' goes with 'Death Description', 'Damage ($Mil)' with 'Damage Description'.
+        base = described[:-len(' Description')]
+        count = next((col for col in (base, f'{base}s', f'{base} ($Mil)') if col in columns), None)
+        grouped.append([count, described] if count else [described])
+    taken = {col for group in grouped for col in group}
+    return grouped + [[col] for col in columns if col not in taken]